@@ -15,6 +15,14 @@
 # Language identifier, creates language specific ngram data files from text 
 # and and identifies the language of a piece of text.
 #
+# The language identified is listed with its score and its share, the share is 
+# the margin of the top language over the runner up relative to the top score, 
+# (top score - runner up score) / top score, so it goes from 0 when the top two 
+# languages are tied to 1 when no other language scored, the other languages 
+# listed have a share of 0. The scores themselves are not normalized, closely
+# related languages all score high on the same text, so the share of the total 
+# score would say little about how confident the identification is.
+#
 
 
 #--------------------------------------------------------------------------
@@ -48,6 +56,18 @@
 # ./languageIdentifier.py --create --text-directory=udhr.texts --ngram-directory=udhr.ngrams
 #
 #
+# Keeping the raw ngram counts, and updating or merging them later:
+#
+#
+# ./languageIdentifier.py --create --text-file=textcat.texts/en.txt --ngram-file=textcat.ngrams/en.txt --count-file=en.counts
+#
+# ./languageIdentifier.py --create --text-directory=textcat.texts --ngram-directory=textcat.ngrams --count-directory=textcat.counts
+#
+# ./languageIdentifier.py --update --count-file=en.counts --text-file=more.en.txt --ngram-file=textcat.ngrams/en.txt
+#
+# ./languageIdentifier.py --update --count-file=en.counts --merge-count-file=host1.en.counts --merge-count-file=host2.en.counts --ngram-file=textcat.ngrams/en.txt
+#
+#
 
 #
 # Identifying text language:
@@ -64,6 +84,11 @@
 # ./languageIdentifier.py --ngram-directory=textcat.ngrams --hint=en --hint-multiplier=0.2 --text="the quick brown fox"
 # ./languageIdentifier.py --ngram-directory=textcat.ngrams --hint=en --hint-multiplier=0.2 --text="the quick brown fox jumped over the lazy dog"
 #
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --top-k=3 --text="the quick brown fox jumped over the lazy dog"
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --top-k=3 --minimum-share=0.1 --text="the quick brown fox jumped over the lazy dog"
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --cascade --text="the quick brown fox jumped over the lazy dog"
+#
 #
 # fr
 #
@@ -152,8 +177,52 @@
 #
 # ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-file=textcat.texts/en.txt
 #
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --statistics
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-file=textcat.texts/fr.txt --text-byte-budget=1024
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --statistics --quantized
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --quantized --text-file=textcat.texts/en.txt
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --evaluate-quantized --text-directory=heldout.texts --top-k=3
+#
 # ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-file=textcat.texts/fr.txt
 #
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-directory=textcat.texts
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-glob='textcat.texts/**/*.txt' --text-prefix-length=4096 --thread-count=16 --top-k=2
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-directory=textcat.texts --cache-file=textcat.cache
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-directory=textcat.texts --compiled
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-directory=textcat.texts --compiled --benchmark --thread-count=8
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-directory=heldout.texts --benchmark-pruning --top-k=3
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --compact-cache --cache-file=textcat.cache --cache-maximum-age=30
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --csv-file=export.tsv --csv-column=comment --process-count=4 > export.languages.tsv
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-directory=textcat.texts --shard=1/2 --result-file=textcat.1.results
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-directory=textcat.texts --shard=2/2 --result-file=textcat.2.results
+#
+# ./languageIdentifier.py --merge-shards --merge-shard-file=textcat.1.results --merge-shard-file=textcat.2.results --result-file=textcat.results
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --create-families --family-file=textcat.families --family-count=32
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --text-directory=textcat.texts --family-file=textcat.families --family-top-k=2
+#
+#
+# Segmenting mixed language text:
+#
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --segment --text="the quick brown fox jumped over the lazy dog le renard brun rapide a sauté par-dessus le chien paresseux"
+#
+# ./languageIdentifier.py --ngram-directory=textcat.ngrams --segment --window-length=20 --text-file=textcat.texts/fr.txt
+#
 #
 
 
@@ -161,15 +230,22 @@
 #
 # Imported modules
 #
+# Importing this module has no side effects, the locale and the logging are only 
+# set up when it is run from the command line. Modules only needed by the command 
+# line, or by a few functions, are imported where they are used to keep importing 
+# this module fast, check with: python -X importtime -c 'import languageIdentifier'
+#
 
-import getopt
-import locale
+import collections
+import heapq
 import logging
 import operator
 import os
 import os.path
 import re
 import sys
+import threading
+import time
 
 
 #--------------------------------------------------------------------------
@@ -180,29 +256,38 @@ import sys
 # Text file name extension
 TEXT_FILE_NAME_EXTENSION = '.txt'
 
+# Thread count, number of threads reading text files when identifying multiple files
+THREAD_COUNT = 8
+
+# Load thread count, number of threads reading ngram files on free threaded Python,
+# they are read one at a time otherwise since the GIL makes the threads slower
+LOAD_THREAD_COUNT = 8
+
+# CSV chunk row count, number of rows identified at a time when identifying a CSV file
+CSV_CHUNK_ROW_COUNT = 1000
+
+# Shard summary file name extension, appended to the result file path of a shard
+SHARD_SUMMARY_FILE_NAME_EXTENSION = '.shard'
 
-#--------------------------------------------------------------------------
-#
-# Setup
-#
 
-# Set the locale
-locale.setlocale(locale.LC_ALL, 'en_US')
+# Locale, set when run from the command line
+LOCALE = 'en_US'
 
 # Logging format - '2014-02-21 09:37:25,480 CRITICAL - ...'
 LOGGING_FORMAT = '%(asctime)s %(levelname)s - %(message)s'
 
-# Logging basic config
-logging.basicConfig(format=LOGGING_FORMAT, level=logging.INFO)
-
 
 #--------------------------------------------------------------------------
 #
 # Globals
 #
 
-# Logger
-logger = logging.getLogger()
+# Logger, the host application decides where the log goes when this module is imported
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Worker language identifier, set in each worker process when identifying a CSV file with worker processes
+workerLanguageIdentifier = None
 
 
 #--------------------------------------------------------------------------
@@ -211,11 +296,30 @@ logger = logging.getLogger()
 #
 #   Purpose:    Ngram class
 #
+#               Scoring only reads the ngram, which can be frozen, see freeze()
+#
 class Ngram(object):
 
     # Ngram maximum length
     NGRAM_MAXIMUM_LENGTH = 4
 
+    # Term regex, matches the terms in a text, anything but non-word characters and digits
+    TERM_REGEX = re.compile(r'[^\W\d]+')
+
+    # Text chunk length, number of characters read at a time when reading text files
+    TEXT_CHUNK_LENGTH = 1024 * 1024
+
+    # ASCII term table, translates ASCII text to lowercase terms separated by spaces,
+    # keeping the letters and the underscore, which is what the term regex matches
+    ASCII_TERM_TABLE = bytes((character + 32) if (65 <= character <= 90) else 
+            character if ((97 <= character <= 122) or (character == 95)) else 32 for character in range(256))
+
+    # ASCII chunk length, number of characters split into terms at a time on the ASCII path
+    ASCII_CHUNK_LENGTH = 64 * 1024
+
+    # Quantized weight maximum, quantized weights are held in the uint16 range
+    QUANTIZED_WEIGHT_MAXIMUM = 65535
+
 
     #--------------------------------------------------------------------------
     #
@@ -225,11 +329,15 @@ class Ngram(object):
     #
     #   Parameters: language        language
     #               ngramFilePath   ngram file path
+    #               quantized       quantize the normalized frequencies to uint16 weights 
+    #                               with a scale per ngram length (optional)
+    #               internDict      intern dict, shared between quantized ngrams so equal
+    #                               ngrams and weights are only held once (optional)
     #
     #   Exceptions: ValueError      if the language is invalid
     #               ValueError      if the ngram file path is invalid
     #
-    def __init__(self, language, ngramFilePath):
+    def __init__(self, language, ngramFilePath, quantized=False, internDict=None):
 
         # Check parameters
         if not language:
@@ -240,22 +348,79 @@ class Ngram(object):
 
 
         # Set the instance variables
+        self.frozen = False
         self.language = language
         self.ngramFilePath = ngramFilePath
         self.ngramDict = None
         self.ngramMaximumLength = 0
+        self.ngramMaximumFrequencyDict = None
+        self.wordNgramDict = None
+        self.ngramScaleDict = None
+        self.loadTime = 0
 
 
-        # Read the ngram file
+        # Read the ngram file, and quantize it if needed, timing it
+        startTime = time.perf_counter()
         self._readNgramFile()
+        if quantized:
+            self._quantize(internDict)
+        self.loadTime = time.perf_counter() - startTime
 
         
 
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     freeze
+    #
+    #   Purpose:    Freeze the ngram, its attributes can no longer be set
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the ngram
+    #
+    def freeze(self):
+
+        # Freeze the ngram
+        self.frozen = True
+
+        # Return the ngram
+        return self
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     __setattr__
+    #
+    #   Purpose:    Set an attribute, unless the ngram is frozen
+    #
+    #   Parameters: name            attribute name
+    #               value           attribute value
+    #
+    #   Exceptions: AttributeError  if the ngram is frozen
+    #
+    #   Returns:    
+    #
+    def __setattr__(self, name, value):
+
+        # Check that the ngram is not frozen
+        if self.__dict__.get('frozen'):
+            raise AttributeError('Frozen ngram: \'{}\', can\'t set: \'{}\''.format(self.language, name))
+
+        # Set the attribute
+        object.__setattr__(self, name, value)
+
+
+
     #--------------------------------------------------------------------------
     #
     #   Method:     _readNgramFile
     #
-    #   Purpose:    Read the ngram file
+    #   Purpose:    Read the ngram file, the ngram file is read in one go and 
+    #               each line is split on whitespace, which is a lot faster 
+    #               than matching each line with a regex
     #
     #   Parameters: 
     #
@@ -268,36 +433,96 @@ class Ngram(object):
         # Ngram dict
         self.ngramDict = dict()
         
-        # Open the ngram file
+        # Ngram maximum frequency dict, maximum normalized frequency keyed by ngram length
+        self.ngramMaximumFrequencyDict = dict()
+
+        # Word ngram dict, the ngrams that are whole words, such as '$the$'
+        self.wordNgramDict = dict()
+
+        # Open, read and close the ngram file
         ngramFile = open(self.ngramFilePath, encoding='utf-8')
+        lineList = ngramFile.read().splitlines()
+        ngramFile.close()
 
-        # Read the ngram file
-        for line in ngramFile:
+        # Read the lines
+        for line in lineList:
 
-            # Clean the line
-            line = line.strip()
+            # Split the line into the ngram and the normalized frequency
+            fieldList = line.split()
+            if len(fieldList) != 2:
+                raise ValueError('Invalid ngram entry: \'{}\', in ngram file: \'{}\''.format(line.strip(), self.ngramFilePath))
             
-            # Parse the line
-            match = re.match(r'^(.*?)\s+(.*)$', line)
-            if match:
+            # Get the ngram and the normalized frequency
+            ngram = fieldList[0]
+            normalizedFrequency = float(fieldList[1])
             
-                # Get the ngram and the normalized frequency
-                ngram = match.group(1)
-                normalizedFrequency = float(match.group(2))
-                
-                # Add the ngram and the normalized frequency to the ngram dict
-                self.ngramDict[ngram] = normalizedFrequency
-                
-                # Update the ngram maximum length
-                self.ngramMaximumLength = max(self.ngramMaximumLength, len(ngram.replace('$', '')))
+            # Add the ngram and the normalized frequency to the ngram dict
+            self.ngramDict[ngram] = normalizedFrequency
             
-            # Match failed
-            else:
-                raise ValueError('Invalid ngram entry: \'{}\', in ngram file: \'{}\''.format(line, self.ngramFilePath))
-        
-        
-        # Close the ngram file
-        ngramFile.close()
+            # Get the ngram length, the '$' can only be at the start and the end
+            ngramLength = len(ngram) - ngram.count('$')
+
+            # Update the ngram maximum length
+            if ngramLength > self.ngramMaximumLength:
+                self.ngramMaximumLength = ngramLength
+
+            # Update the ngram maximum frequency for this length
+            if normalizedFrequency > self.ngramMaximumFrequencyDict.get(ngramLength, 0):
+                self.ngramMaximumFrequencyDict[ngramLength] = normalizedFrequency
+
+            # Add the ngram to the word ngram dict if it is closed off at both ends
+            if ngramLength == len(ngram) - 2 and ngramLength > 0:
+                self.wordNgramDict[ngram] = normalizedFrequency
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _quantize
+    #
+    #   Purpose:    Quantize the normalized frequencies to integer weights in the 
+    #               uint16 range, with a scale per ngram length so each length 
+    #               keeps its full precision, the normalized frequency is the 
+    #               weight multiplied by the scale for the ngram length
+    #
+    #               Ngrams and weights are interned in the intern dict, ngram 
+    #               files share a lot of ngrams, and only have a few thousand 
+    #               distinct weights between them
+    #
+    #   Parameters: internDict      intern dict (optional)
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    
+    #
+    def _quantize(self, internDict=None):
+
+        # Intern dict, not shared if not passed
+        if internDict is None:
+            internDict = dict()
+
+        # Ngram scale dict, scale keyed by ngram length
+        self.ngramScaleDict = {ngramLength: maximumFrequency / Ngram.QUANTIZED_WEIGHT_MAXIMUM 
+                for ngramLength, maximumFrequency in self.ngramMaximumFrequencyDict.items()}
+
+        # Quantized ngram dict
+        quantizedNgramDict = dict()
+
+        # Loop over the ngram dict, quantizing the normalized frequencies
+        for ngram, normalizedFrequency in self.ngramDict.items():
+
+            # Get the ngram length
+            ngramLength = len(ngram) - ngram.count('$')
+
+            # Get the weight, never rounding down to nothing so the ngram still scores
+            weight = max(1, round(normalizedFrequency / self.ngramScaleDict[ngramLength]))
+
+            # Add the interned ngram and weight to the quantized ngram dict
+            quantizedNgramDict[internDict.setdefault(ngram, ngram)] = internDict.setdefault(weight, weight)
+
+        # Replace the ngram dict and the word ngram dict
+        self.wordNgramDict = {internDict[ngram]: quantizedNgramDict[ngram] for ngram in self.wordNgramDict}
+        self.ngramDict = quantizedNgramDict
 
 
 
@@ -309,12 +534,14 @@ class Ngram(object):
     #
     #   Parameters: textNgramDict   text ngram dict (optional)
     #               text            text (optional)
+    #               wordsOnly       score against the word ngrams only, the text 
+    #                               ngram dict should only hold word ngrams (optional)
     #
     #   Exceptions: ValueError      if the text ngram dict/text is invalid
     #
     #   Returns:    the score
     #
-    def score(self, textNgramDict=None, text=None):
+    def score(self, textNgramDict=None, text=None, wordsOnly=False):
 
         # Check parameters
         if not textNgramDict and not text:
@@ -324,9 +551,18 @@ class Ngram(object):
 
         
         # Extract the text ngram dict if needed
-        if text:
+        if text and wordsOnly:
+            textNgramDict = Ngram.extractWordNgramDict(text, ngramMaximumLength=self.ngramMaximumLength)
+        elif text:
             textNgramDict = Ngram.extractNgramDict(text, ngramMaximumLength=self.ngramMaximumLength)
         
+        # Score against the word ngram dict if needed, it is a lot smaller than the ngram dict
+        ngramDict = self.wordNgramDict if wordsOnly else self.ngramDict
+        
+        # Score against the quantized ngram dict if needed
+        if self.ngramScaleDict:
+            return self.scoreGrouped(Ngram.groupNgramDict(textNgramDict), wordsOnly=wordsOnly)
+        
         
         # The score
         score = 0
@@ -336,7 +572,7 @@ class Ngram(object):
         for textNgram, textFrequency in textNgramDict.items():
             
             # Get the normalized frequency from the ngram dict
-            normalizedFrequency = self.ngramDict.get(textNgram)
+            normalizedFrequency = ngramDict.get(textNgram)
 
             # Increment the score if the normalized frequency is defined
             if normalizedFrequency:
@@ -350,475 +586,4162 @@ class Ngram(object):
 
     #--------------------------------------------------------------------------
     #
-    #   Function:   extractNgramDict()
-    #
-    #   Purpose:    Extract the ngram dict from the text
+    #   Method:     scoreGrouped
     #
-    #   Called by:   
+    #   Purpose:    Score against the passed text ngram group dict with the 
+    #               quantized ngram dict, the integer weights are accumulated 
+    #               separately for each ngram length, and only scaled at the end
     #
-    #   Parameters: text                the text
-    #               ngramMaximumLength  ngram maximum length
+    #   Parameters: textNgramGroupDict  text ngram group dict, see groupNgramDict()
+    #               wordsOnly           score against the word ngrams only (optional)
     #
-    #   Exceptions: ValueError      if the text is invalid
+    #   Exceptions: 
     #
-    #   Returns:   the ngram dict
+    #   Returns:    the score
     #
-    @staticmethod
-    def extractNgramDict(text, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH):
+    def scoreGrouped(self, textNgramGroupDict, wordsOnly=False):
 
-        # Check parameters
-        if not text:
-           raise ValueError('Invalid text')
+        # Score against the word ngram dict if needed
+        ngramDict = self.wordNgramDict if wordsOnly else self.ngramDict
 
+        # The score
+        score = 0
 
-        # Split the text into a list of terms
-        termList = re.split(r'[\W\s\d]+', text)
+        # Loop over the ngram lengths
+        for ngramLength, textNgramDict in textNgramGroupDict.items():
 
+            # The integer score for the ngram length
+            lengthScore = 0
 
-        # The ngram dict
-        ngramDict = dict()
+            # Loop over all the text ngrams of this length,
+            # and increment the integer score if applicable
+            for textNgram, textFrequency in textNgramDict.items():
 
-        # Loop over each term in the term list
-        for term in termList:
-        
-            # Skip empty terms
-            if not term:
-                continue
-        
-            # Downcase
-            term = term.lower()
+                # Get the weight from the ngram dict
+                weight = ngramDict.get(textNgram)
 
-            # Term length
-            termLength = len(term)
+                # Increment the integer score if the weight is defined
+                if weight:
+                    lengthScore += weight * textFrequency
 
-            # Adjusted ngram length, in case the term is too short
-            ngramAdjustedLength = min(termLength, ngramMaximumLength)
+            # Scale the integer score and add it to the score
+            if lengthScore:
+                score += self.ngramScaleDict[ngramLength] * lengthScore
 
-            # Loop over the ngram range
-            for start in range(1 - ngramAdjustedLength, termLength):
-    
-                # End of the ngram range
-                end = min(start + ngramAdjustedLength, termLength)
-    
-                # Start can never be less than 0
-                if start < 0:
-                    start = 0
-
-                # Extract the ngram we want
-                ngram = term[start:end]
-
-                # Close off start and end
-                if start == 0:
-                    ngram = '$' + ngram 
-                if end == termLength:
-                    ngram += '$' 
-    
-                # And add it to the ngram dict
-                if ngram not in ngramDict:
-                    ngramDict[ngram] = 0
-                ngramDict[ngram] += 1
 
+        # Return the score
+        return score
 
-        # Log
-        logger.info('Terms processed: %d, ngrams extracted: %d.', len(termList), len(ngramDict))
 
 
-        # Return the ngram dict
-        return ngramDict
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     getNormalizedFrequencyDict
+    #
+    #   Purpose:    Get the normalized frequency dict, scaling the weights back
+    #               to normalized frequencies if the ngram is quantized
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the normalized frequency dict, normalized frequency keyed by ngram
+    #
+    def getNormalizedFrequencyDict(self):
+
+        # The ngram dict holds the normalized frequencies if the ngram is not quantized
+        if not self.ngramScaleDict:
+            return self.ngramDict
+
+        # Scale the weights
+        return {ngram: weight * self.ngramScaleDict[len(ngram) - ngram.count('$')] for ngram, weight in self.ngramDict.items()}
 
 
 
     #--------------------------------------------------------------------------
     #
-    #   Function:   normalizeNgramDict()
-    #
-    #   Purpose:    Normalize the ngram dict 
+    #   Method:     scoreBound
     #
-    #   Called by:   
+    #   Purpose:    Get the upper bound of the score against a text, this is the 
+    #               score the text would get if every text ngram had the maximum
+    #               normalized frequency for its length
     #
-    #   Parameters: ngramDict           the ngram dict
-    #               ngramMaximumLength  ngram maximum length
+    #   Parameters: textNgramLengthDict     text ngram length dict, total text 
+    #                                       frequency keyed by ngram length
     #
-    #   Exceptions: ValueError      if the ngram dict is invalid
+    #   Exceptions: 
     #
-    #   Returns:   the same ngram dict
+    #   Returns:    the score upper bound
     #
-    @staticmethod
-    def normalizeNgramDict(ngramDict, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH):
-
-        # Check parameters
-        if not ngramDict:
-           raise ValueError('Invalid ngram dict')
-
+    def scoreBound(self, textNgramLengthDict):
 
-        # Loop over all the ngrams by length, adding up the frequencies and then normalizing them
-        for ngramLength in range(ngramMaximumLength, 0, -1):
-            
-            # Total frequency for this length
-            totalFrequency = 0
-            
-            # Add up the frequencies
-            for ngram, frequency in ngramDict.items():
-                if len(ngram.replace('$', '')) == ngramLength:
-                    totalFrequency += frequency
-            
-            # Normalize the frequencies and set them back in the ngrams hash
-            for ngram, frequency in ngramDict.items():
-                if len(ngram.replace('$', '')) == ngramLength:
-                    ngramDict[ngram] = (frequency / totalFrequency) * ngramLength
+        # The score upper bound
+        scoreBound = 0
 
+        # Loop over all the ngram lengths, adding the maximum score for each
+        for ngramLength, textFrequency in textNgramLengthDict.items():
+            scoreBound += textFrequency * self.ngramMaximumFrequencyDict.get(ngramLength, 0)
 
-        # Return the ngram dict
-        return ngramDict
+        # Return the score upper bound
+        return scoreBound
 
 
 
     #--------------------------------------------------------------------------
     #
-    #   Function:   createNgramFile()
-    #
-    #   Purpose:    
+    #   Method:     scoreBounded
     #
-    #   Called by:   
+    #   Purpose:    Score against the passed text ngram group list one ngram 
+    #               length at a time, giving up as soon as the score can no 
+    #               longer reach the minimum score, the bound is only checked 
+    #               once per ngram length since checking it for every text ngram 
+    #               costs more than the scoring it saves
     #
-    #   Parameters: textFilePath        the text file path
-    #               textFile            the text file
-    #               ngramFilePath       the ngram file path
-    #               ngramFile           the ngram file
-    #               ngramMaximumLength  the ngram maximum length
+    #   Parameters: textNgramGroupList  text ngram group list, tuple of ngram length, 
+    #                                   text ngram dict and total text frequency, 
+    #                                   best in order of ascending ngram length, 
+    #                                   the shorter ngrams are the cheapest to score
+    #               minimumScore        minimum score
+    #               scoreBound          score upper bound, see scoreBound()
     #
-    #   Exceptions: ValueError      if the text file path/text file is invalid
-    #               ValueError      if the ngram file path/ngram file is invalid
+    #   Exceptions: 
     #
-    #   Returns:   
+    #   Returns:    the score, None if the score could not reach the minimum score
     #
-    @staticmethod
-    def createNgramFile(textFilePath=None, textFile=None, ngramFilePath=None, ngramFile=None,
-            ngramMaximumLength=NGRAM_MAXIMUM_LENGTH):
+    def scoreBounded(self, textNgramGroupList, minimumScore, scoreBound):
 
-        # Check parameters
-        if not textFilePath and not textFile:
-            raise ValueError('Invalid text file path/text file')
-        elif textFilePath and textFile:
-            raise ValueError('Invalid text file path/text file')
-        
-        if not ngramFilePath and not ngramFile:
-            raise ValueError('Invalid ngram file path/ngram file')
-        elif ngramFilePath and ngramFile:
-            raise ValueError('Invalid ngram file path/ngram file')
-        
-        
-        # Open the text file if needed
-        if textFilePath:
-            textFile = open(textFilePath, encoding='utf-8')
-    
-        # Read the text file
-        text = textFile.read()
-    
-        # Extract the ngram dict
-        ngramDict = Ngram.extractNgramDict(text, ngramMaximumLength=ngramMaximumLength)
+        # The score
+        score = 0
 
-        # Normalize the ngram dict
-        ngramDict = Ngram.normalizeNgramDict(ngramDict, ngramMaximumLength=ngramMaximumLength)
+        # The maximum score the remaining text ngrams can add
+        remainingScore = scoreBound
 
-        # Create the ngram file if needed
-        if ngramFilePath:
-            ngramFile = open(ngramFilePath, 'w', encoding='utf-8')
+        # Loop over the ngram lengths in the text ngram group list
+        for ngramLength, textNgramDict, textFrequencyTotal in textNgramGroupList:
 
-        # Sort the ngram dict in order of descending frequency
-        for ngram, frequency in sorted(ngramDict.items(), key=operator.itemgetter(1), reverse=True):
-            ngramFile.write('{:<10}    {:.20f}\n'.format(ngram, frequency))
-    
-        # Close the text file if needed
-        if textFilePath:
-            textFile.close()
+            # The score for the ngram length, an integer score if the ngram dict is quantized
+            lengthScore = 0
 
-        # Close the ngram file if needed
-        if ngramFilePath:
-            ngramFile.close()
+            # Loop over all the text ngrams of this length,
+            # and increment the score for the ngram length if applicable
+            for textNgram, textFrequency in textNgramDict.items():
 
+                # Get the normalized frequency/weight from the ngram dict
+                normalizedFrequency = self.ngramDict.get(textNgram)
 
+                # Increment the score for the ngram length if the normalized frequency/weight is defined
+                if normalizedFrequency:
+                    lengthScore += normalizedFrequency * textFrequency
 
-#--------------------------------------------------------------------------
-#
-#   Class:      LanguageIdentifier
-#
-#   Purpose:    Language identifier
-#
-class LanguageIdentifier(object):
+            # Scale the integer score if the ngram dict is quantized, and add it to the score
+            if lengthScore:
+                score += (self.ngramScaleDict[ngramLength] * lengthScore) if self.ngramScaleDict else lengthScore
+
+            # Decrement the remaining score by the most the text ngrams of this length could have added
+            remainingScore -= textFrequencyTotal * self.ngramMaximumFrequencyDict.get(ngramLength, 0)
+
+            # Give up if the minimum score can no longer be reached
+            if score + remainingScore < minimumScore:
+                return None
+
+
+        # Return the score
+        return score
 
-    # Ngram file name extension
-    NGRAM_FILE_NAME_EXTENSION = '.txt'
-    
-    # Hint multiplier (10%)
-    HINT_MULTIPLIER = 0.10
 
 
     #--------------------------------------------------------------------------
     #
-    #   Method:     __init__
-    #   
-    #   Purpose:    Constructor
+    #   Method:     getStatistics
     #
-    #   Parameters: ngramDirectoryPath      ngram directory path
-    #               ngramFileNameExtension  ngram file name extension (optional)
-    #               hintMultiplier          hint multiplier (optional)
+    #   Purpose:    Get the statistics for this ngram, the number of ngrams, the 
+    #               number of ngrams per ngram length, the load time, and the bytes
+    #               used by each representation of the ngrams
     #
-    #   Exceptions: ValueError      if the ngram directory path is invalid
-    #               ValueError      if no ngram files were found
+    #               The bytes used by a representation count the dict itself, and 
+    #               the keys and values not already counted in an earlier 
+    #               representation, since representations share keys and values,
+    #               as do quantized ngrams of different languages
     #
-    def __init__(self, ngramDirectoryPath, ngramFileNameExtension=NGRAM_FILE_NAME_EXTENSION, 
-            hintMultiplier=HINT_MULTIPLIER):
-
+    #   Parameters: seenIdSet       ids of the keys and values already counted (optional)
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the statistics dict
+    #
+    def getStatistics(self, seenIdSet=None):
+
+        # Ngram length count dict, number of ngrams keyed by ngram length
+        ngramLengthCountDict = dict()
+        for ngram in self.ngramDict:
+            ngramLength = len(ngram.replace('$', ''))
+            ngramLengthCountDict[ngramLength] = ngramLengthCountDict.get(ngramLength, 0) + 1
+
+
+        # Ids of the keys and values already counted, not shared if not passed
+        if seenIdSet is None:
+            seenIdSet = set()
+
+        # Representation dict, bytes used keyed by representation name
+        representationDict = dict()
+        representationDict['ngramDict'] = Ngram._getDictBytes(self.ngramDict, seenIdSet)
+        representationDict['wordNgramDict'] = Ngram._getDictBytes(self.wordNgramDict, seenIdSet)
+        representationDict['ngramMaximumFrequencyDict'] = Ngram._getDictBytes(self.ngramMaximumFrequencyDict or {}, seenIdSet)
+        if self.ngramScaleDict:
+            representationDict['ngramScaleDict'] = Ngram._getDictBytes(self.ngramScaleDict, seenIdSet)
+        representationDict['ngramFile'] = {'totalBytes': os.path.getsize(self.ngramFilePath)}
+
+
+        # Return the statistics dict
+        return {'language': self.language, 
+                'quantized': self.ngramScaleDict is not None,
+                'ngramCount': len(self.ngramDict), 
+                'ngramLengthCountDict': ngramLengthCountDict, 
+                'loadTime': self.loadTime, 
+                'representationDict': representationDict}
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   _getDictBytes()
+    #
+    #   Purpose:    Get the bytes used by a dict, its keys and its values, 
+    #               skipping over keys and values already counted
+    #
+    #   Called by:  getStatistics()
+    #
+    #   Parameters: dictionary      the dict
+    #               seenIdSet       ids of the keys and values already counted, 
+    #                               updated with the keys and values counted here
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   the bytes dict, bytes used by the dict, the keys, the values, and in total
+    #
+    @staticmethod
+    def _getDictBytes(dictionary, seenIdSet):
+
+        # Bytes used by the dict, the keys and the values
+        dictBytes = sys.getsizeof(dictionary)
+        keyBytes = 0
+        valueBytes = 0
+
+        # Add up the keys and the values not already counted
+        for key, value in dictionary.items():
+            if id(key) not in seenIdSet:
+                seenIdSet.add(id(key))
+                keyBytes += sys.getsizeof(key)
+            if id(value) not in seenIdSet:
+                seenIdSet.add(id(value))
+                valueBytes += sys.getsizeof(value)
+
+
+        # Return the bytes dict
+        return {'dictBytes': dictBytes, 'keyBytes': keyBytes, 'valueBytes': valueBytes, 
+                'totalBytes': dictBytes + keyBytes + valueBytes}
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   groupNgramDict()
+    #
+    #   Purpose:    Group the ngram dict by ngram length, so quantized ngrams can 
+    #               score a whole ngram length at a time, see scoreGrouped()
+    #
+    #   Called by:   
+    #
+    #   Parameters: ngramDict       the ngram dict
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   the ngram group dict, ngram dict keyed by ngram length
+    #
+    @staticmethod
+    def groupNgramDict(ngramDict):
+
+        # Ngram group dict
+        ngramGroupDict = dict()
+
+        # Loop over the ngram dict, adding each ngram to the ngram dict for its length
+        for ngram, frequency in ngramDict.items():
+            ngramGroupDict.setdefault(len(ngram) - ngram.count('$'), dict())[ngram] = frequency
+
+        # Return the ngram group dict
+        return ngramGroupDict
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   extractNgramDict()
+    #
+    #   Purpose:    Extract the ngram dict from the text
+    #
+    #   Called by:   
+    #
+    #   Parameters: text                the text
+    #               ngramMaximumLength  ngram maximum length
+    #
+    #   Exceptions: ValueError      if the text is invalid
+    #
+    #   Returns:   the ngram dict
+    #
+    @staticmethod
+    def extractNgramDict(text, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH):
+
         # Check parameters
-        if not ngramDirectoryPath:
-            raise ValueError('Invalid ngram directory path')
+        if not text:
+           raise ValueError('Invalid text')
+
+
+        # Extract the ngram dict from the terms in the text
+        return Ngram.extractNgramDictFromTerms(Ngram.iterateTerms(text), ngramMaximumLength=ngramMaximumLength)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   extractWordNgramDict()
+    #
+    #   Purpose:    Extract the word ngram dict from the text, these are the ngrams 
+    #               for the terms no longer than the ngram maximum length, such as 
+    #               '$the$', this takes a single ngram per term so it is a lot 
+    #               cheaper than extracting the ngram dict
+    #
+    #   Called by:   
+    #
+    #   Parameters: text                the text
+    #               ngramMaximumLength  ngram maximum length
+    #
+    #   Exceptions: ValueError      if the text is invalid
+    #
+    #   Returns:   the word ngram dict
+    #
+    @staticmethod
+    def extractWordNgramDict(text, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH):
+
+        # Check parameters
+        if not text:
+           raise ValueError('Invalid text')
+
+
+        # The word ngram dict
+        wordNgramDict = dict()
+
+        # Loop over each term in the text
+        for term in Ngram.iterateTerms(text):
+
+            # Add the term to the word ngram dict if it is short enough
+            if len(term) <= ngramMaximumLength:
+                wordNgram = '$' + term + '$'
+                wordNgramDict[wordNgram] = wordNgramDict.get(wordNgram, 0) + 1
+
+
+        # Return the word ngram dict
+        return wordNgramDict
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   extractNgramDictFromFile()
+    #
+    #   Purpose:    Extract the ngram dict from a text file, the text file is read 
+    #               in chunks so it is never held in memory in full
+    #
+    #   Called by:   
+    #
+    #   Parameters: textFile            the text file
+    #               ngramMaximumLength  ngram maximum length
+    #               chunkLength         the number of characters to read at a time
+    #
+    #   Exceptions: ValueError      if the text file is invalid
+    #
+    #   Returns:   the ngram dict
+    #
+    @staticmethod
+    def extractNgramDictFromFile(textFile, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH, chunkLength=TEXT_CHUNK_LENGTH):
+
+        # Check parameters
+        if not textFile:
+           raise ValueError('Invalid text file')
+
+
+        # Extract the ngram dict from the terms in the text file
+        return Ngram.extractNgramDictFromTerms(Ngram.iterateTermsFromFile(textFile, chunkLength=chunkLength), 
+                ngramMaximumLength=ngramMaximumLength)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   extractNgramDictFromBytes()
+    #
+    #   Purpose:    Extract the ngram dict from UTF-8 encoded text, the text is 
+    #               decoded in chunks so it is never held in memory in full
+    #
+    #   Called by:   
+    #
+    #   Parameters: data                the text data, bytes, bytearray, memoryview or mmap
+    #               ngramMaximumLength  ngram maximum length
+    #               chunkLength         the number of bytes to decode at a time
+    #               byteBudget          the number of bytes to decode, a character cut 
+    #                                   off by the byte budget is dropped (optional)
+    #
+    #   Exceptions: ValueError          if the text data is invalid
+    #               UnicodeDecodeError  if the text data is not valid UTF-8
+    #
+    #   Returns:   the ngram dict
+    #
+    @staticmethod
+    def extractNgramDictFromBytes(data, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH, chunkLength=TEXT_CHUNK_LENGTH, byteBudget=None):
+
+        # Check parameters
+        if data is None:
+           raise ValueError('Invalid text data')
+
+
+        # Extract the ngram dict from the terms in the text data
+        return Ngram.extractNgramDictFromTerms(Ngram.iterateTermsFromChunks(Ngram.iterateTextChunksFromBytes(data, 
+                chunkLength=chunkLength, byteBudget=byteBudget)), ngramMaximumLength=ngramMaximumLength)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   extractNgramDictFromTerms()
+    #
+    #   Purpose:    Extract the ngram dict from terms, the terms are consumed 
+    #               one at a time so only the ngram dict is held in memory
+    #
+    #   Called by:   
+    #
+    #   Parameters: terms               the terms, downcased, any iterable
+    #               ngramMaximumLength  ngram maximum length
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   the ngram dict
+    #
+    @staticmethod
+    def extractNgramDictFromTerms(terms, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH):
+
+        # The ngram dict
+        ngramDict = dict()
+
+        # The number of terms processed
+        termCount = 0
+
+        # Loop over each term
+        for term in terms:
+        
+            # Loop over the ngrams in the term
+            for ngram in Ngram.extractTermNgramList(term, ngramMaximumLength=ngramMaximumLength):
+    
+                # And add it to the ngram dict
+                ngramDict[ngram] = ngramDict.get(ngram, 0) + 1
+
+            # Count the term
+            termCount += 1
+
+
+        # Log
+        logger.info('Terms processed: %d, ngrams extracted: %d.', termCount, len(ngramDict))
+
+
+        # Return the ngram dict
+        return ngramDict
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   iterateTerms()
+    #
+    #   Purpose:    Iterate over the downcased terms in the text, ASCII text takes 
+    #               a faster path that downcases and splits the text with a 
+    #               translation table rather than a regex
+    #
+    #   Called by:   
+    #
+    #   Parameters: text                the text
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   a generator over the terms
+    #
+    @staticmethod
+    def iterateTerms(text):
+
+        # Take the ASCII path if we can
+        if text.isascii():
+            return Ngram._iterateAsciiTerms(text)
+
+        # Take the regex path otherwise
+        return (match.group(0).lower() for match in Ngram.TERM_REGEX.finditer(text))
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   _iterateAsciiTerms()
+    #
+    #   Purpose:    Iterate over the downcased terms in ASCII text, the text is 
+    #               translated to lowercase terms separated by spaces and split 
+    #               a chunk at a time, so neither the translated text nor the 
+    #               term list for the whole text is ever held in memory
+    #
+    #   Called by:  iterateTerms()
+    #
+    #   Parameters: text                the text, ASCII only
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   a generator over the terms
+    #
+    @staticmethod
+    def _iterateAsciiTerms(text):
+
+        # Loop over the chunks
+        start = 0
+        while start < len(text):
+
+            # Translate the chunk, ending it after its last space so no term gets split, 
+            # or at the end of the text, and growing it if it has no space at all
+            chunkLength = Ngram.ASCII_CHUNK_LENGTH
+            while True:
+                translatedChunk = text[start:start + chunkLength].encode('ascii').translate(Ngram.ASCII_TERM_TABLE)
+                end = start + len(translatedChunk)
+                if end >= len(text):
+                    break
+                separatorIndex = translatedChunk.rfind(b' ')
+                if separatorIndex != -1:
+                    translatedChunk = translatedChunk[:separatorIndex + 1]
+                    end = start + separatorIndex + 1
+                    break
+                chunkLength *= 2
+
+            # Yield the terms in the chunk
+            yield from translatedChunk.decode('ascii').split()
+
+            # Next chunk
+            start = end
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   iterateTermsFromFile()
+    #
+    #   Purpose:    Iterate over the downcased terms in a text file, reading the 
+    #               text file in chunks
+    #
+    #   Called by:   
+    #
+    #   Parameters: textFile            the text file
+    #               chunkLength         the number of characters to read at a time
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   a generator over the terms
+    #
+    @staticmethod
+    def iterateTermsFromFile(textFile, chunkLength=TEXT_CHUNK_LENGTH):
+
+        # Iterate over the terms in the chunks read from the text file
+        return Ngram.iterateTermsFromChunks(iter(lambda: textFile.read(chunkLength), ''))
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   iterateTermsFromChunks()
+    #
+    #   Purpose:    Iterate over the downcased terms in text chunks, a term running 
+    #               up to the end of a chunk is held back and joined with the 
+    #               start of the next chunk
+    #
+    #   Called by:  iterateTermsFromFile(), extractNgramDictFromBytes()
+    #
+    #   Parameters: chunks              the text chunks, any iterable
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   a generator over the terms
+    #
+    @staticmethod
+    def iterateTermsFromChunks(chunks):
+
+        # The partial term held back from the end of the previous chunk
+        partialTerm = ''
+
+        # Loop over the chunks
+        for chunk in chunks:
+
+            # Join the partial term to the chunk
+            chunk = partialTerm + chunk
+
+            # Hold back the term running up to the end of the chunk, it may continue in the next chunk
+            end = len(chunk)
+            while end > 0 and Ngram.TERM_REGEX.match(chunk, end - 1):
+                end -= 1
+            partialTerm = chunk[end:]
+
+            # Yield the terms in the rest of the chunk
+            if end > 0:
+                yield from Ngram.iterateTerms(chunk[:end])
+
+        # Flush the partial term at the end of the chunks
+        if partialTerm:
+            yield from Ngram.iterateTerms(partialTerm)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   iterateTextChunksFromBytes()
+    #
+    #   Purpose:    Iterate over the text chunks decoded from UTF-8 encoded text, 
+    #               with an incremental decoder so a character split between two 
+    #               byte chunks is decoded whole, and without copying the text 
+    #               data, which can be memory mapped
+    #
+    #   Called by:  extractNgramDictFromBytes()
+    #
+    #   Parameters: data                the text data, bytes, bytearray, memoryview or mmap
+    #               chunkLength         the number of bytes to decode at a time
+    #               byteBudget          the number of bytes to decode, a character cut 
+    #                                   off by the byte budget is dropped (optional)
+    #
+    #   Exceptions: UnicodeDecodeError  if the text data is not valid UTF-8
+    #
+    #   Returns:   a generator over the text chunks
+    #
+    @staticmethod
+    def iterateTextChunksFromBytes(data, chunkLength=TEXT_CHUNK_LENGTH, byteBudget=None):
+
+        # Imported here, only needed when decoding bytes
+        import codecs
+
+        # Create the incremental decoder
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        # View the text data, releasing the view when done so a memory map can be closed
+        with memoryview(data) as view:
+
+            # Set the number of bytes to decode, and whether that is the end of the text data
+            byteLength = len(view) if byteBudget is None else min(len(view), byteBudget)
+            final = byteLength == len(view)
+
+            # Loop over the byte chunks, decoding them
+            for start in range(0, byteLength, chunkLength):
+                chunk = decoder.decode(view[start:min(start + chunkLength, byteLength)])
+                if chunk:
+                    yield chunk
+
+            # Flush the decoder at the end of the text data, a character 
+            # cut off by the byte budget is left in the decoder and dropped
+            if final:
+                chunk = decoder.decode(b'', final=True)
+                if chunk:
+                    yield chunk
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   extractTermNgramList()
+    #
+    #   Purpose:    Extract the ngram list from a term, ngrams at the start 
+    #               and the end of the term are closed off with a '$'
+    #
+    #   Called by:   
+    #
+    #   Parameters: term                the term, downcased
+    #               ngramMaximumLength  ngram maximum length
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   the ngram list
+    #
+    @staticmethod
+    def extractTermNgramList(term, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH):
+
+        # The ngram list
+        ngramList = list()
+
+        # Term length
+        termLength = len(term)
+
+        # Adjusted ngram length, in case the term is too short
+        ngramAdjustedLength = min(termLength, ngramMaximumLength)
+
+        # Loop over the ngram range
+        for start in range(1 - ngramAdjustedLength, termLength):
+
+            # End of the ngram range
+            end = min(start + ngramAdjustedLength, termLength)
+
+            # Start can never be less than 0
+            if start < 0:
+                start = 0
+
+            # Extract the ngram we want
+            ngram = term[start:end]
+
+            # Close off start and end
+            if start == 0:
+                ngram = '$' + ngram 
+            if end == termLength:
+                ngram += '$' 
+
+            # And add it to the ngram list
+            ngramList.append(ngram)
+
+
+        # Return the ngram list
+        return ngramList
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   normalizeNgramDict()
+    #
+    #   Purpose:    Normalize the ngram dict 
+    #
+    #   Called by:   
+    #
+    #   Parameters: ngramDict           the ngram dict
+    #               ngramMaximumLength  ngram maximum length
+    #
+    #   Exceptions: ValueError      if the ngram dict is invalid
+    #
+    #   Returns:   the same ngram dict
+    #
+    @staticmethod
+    def normalizeNgramDict(ngramDict, ngramMaximumLength=NGRAM_MAXIMUM_LENGTH):
+
+        # Check parameters
+        if not ngramDict:
+           raise ValueError('Invalid ngram dict')
+
+
+        # Loop over all the ngrams by length, adding up the frequencies and then normalizing them
+        for ngramLength in range(ngramMaximumLength, 0, -1):
+            
+            # Total frequency for this length
+            totalFrequency = 0
+            
+            # Add up the frequencies
+            for ngram, frequency in ngramDict.items():
+                if len(ngram.replace('$', '')) == ngramLength:
+                    totalFrequency += frequency
+            
+            # Normalize the frequencies and set them back in the ngrams hash
+            for ngram, frequency in ngramDict.items():
+                if len(ngram.replace('$', '')) == ngramLength:
+                    ngramDict[ngram] = (frequency / totalFrequency) * ngramLength
+
+
+        # Return the ngram dict
+        return ngramDict
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   createNgramFile()
+    #
+    #   Purpose:    Create an ngram file from a text file, and optionally a 
+    #               count file keeping the raw counts so the ngram file can be
+    #               updated later without reprocessing the text
+    #
+    #   Called by:   
+    #
+    #   Parameters: textFilePath        the text file path
+    #               textFile            the text file
+    #               ngramFilePath       the ngram file path
+    #               ngramFile           the ngram file
+    #               ngramMaximumLength  the ngram maximum length
+    #               countFilePath       the count file path (optional)
+    #
+    #   Exceptions: ValueError      if the text file path/text file is invalid
+    #               ValueError      if the ngram file path/ngram file is invalid
+    #
+    #   Returns:   
+    #
+    @staticmethod
+    def createNgramFile(textFilePath=None, textFile=None, ngramFilePath=None, ngramFile=None,
+            ngramMaximumLength=NGRAM_MAXIMUM_LENGTH, countFilePath=None):
+
+        # Check parameters
+        if not textFilePath and not textFile:
+            raise ValueError('Invalid text file path/text file')
+        elif textFilePath and textFile:
+            raise ValueError('Invalid text file path/text file')
+        
+        if not ngramFilePath and not ngramFile:
+            raise ValueError('Invalid ngram file path/ngram file')
+        elif ngramFilePath and ngramFile:
+            raise ValueError('Invalid ngram file path/ngram file')
+        
+        
+        # Open the text file if needed
+        if textFilePath:
+            textFile = open(textFilePath, encoding='utf-8')
+    
+        # Extract the ngram dict from the text file
+        ngramDict = Ngram.extractNgramDictFromFile(textFile, ngramMaximumLength=ngramMaximumLength)
+    
+        # Close the text file if needed
+        if textFilePath:
+            textFile.close()
+
+        # Write the count file if needed, before the counts get normalized
+        if countFilePath:
+            Ngram.writeCountFile(ngramDict, countFilePath=countFilePath)
+
+        # Normalize the ngram dict
+        ngramDict = Ngram.normalizeNgramDict(ngramDict, ngramMaximumLength=ngramMaximumLength)
+
+        # Write the ngram file
+        Ngram.writeNgramFile(ngramDict, ngramFilePath=ngramFilePath, ngramFile=ngramFile)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   writeNgramFile()
+    #
+    #   Purpose:    Write a normalized ngram dict to an ngram file
+    #
+    #   Called by:   
+    #
+    #   Parameters: ngramDict           the ngram dict, normalized
+    #               ngramFilePath       the ngram file path
+    #               ngramFile           the ngram file
+    #
+    #   Exceptions: ValueError      if the ngram file path/ngram file is invalid
+    #
+    #   Returns:   
+    #
+    @staticmethod
+    def writeNgramFile(ngramDict, ngramFilePath=None, ngramFile=None):
+
+        # Check parameters
+        if not ngramFilePath and not ngramFile:
+            raise ValueError('Invalid ngram file path/ngram file')
+        elif ngramFilePath and ngramFile:
+            raise ValueError('Invalid ngram file path/ngram file')
+        
+
+        # Create the ngram file if needed
+        if ngramFilePath:
+            ngramFile = open(ngramFilePath, 'w', encoding='utf-8')
+
+        # Sort the ngram dict in order of descending frequency, then ngram, so equal 
+        # frequencies always come out in the same order whatever the dict order
+        for ngram, frequency in sorted(ngramDict.items(), key=lambda item: (-item[1], item[0])):
+            ngramFile.write('{:<10}    {:.20f}\n'.format(ngram, frequency))
+    
+        # Close the ngram file if needed
+        if ngramFilePath:
+            ngramFile.close()
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   writeCountFile()
+    #
+    #   Purpose:    Write a raw count ngram dict to a count file, the count file
+    #               starts with the total count for each ngram length, for example
+    #               '#4    12345', followed by the ngrams and their counts
+    #
+    #   Called by:   
+    #
+    #   Parameters: ngramDict           the ngram dict, raw counts
+    #               countFilePath       the count file path
+    #
+    #   Exceptions: ValueError      if the ngram dict is invalid
+    #               ValueError      if the count file path is invalid
+    #
+    #   Returns:   
+    #
+    @staticmethod
+    def writeCountFile(ngramDict, countFilePath):
+
+        # Check parameters
+        if not ngramDict:
+            raise ValueError('Invalid ngram dict')
+
+        if not countFilePath:
+            raise ValueError('Invalid count file path')
+
+
+        # Count dict, total count keyed by ngram length
+        countDict = dict()
+        for ngram, count in ngramDict.items():
+            ngramLength = len(ngram.replace('$', ''))
+            countDict[ngramLength] = countDict.get(ngramLength, 0) + count
+
+
+        # Write to a temporary file and move it into place so an existing 
+        # count file is never left half written, the whole count file is 
+        # rewritten, so this costs the size of the count file
+        temporaryCountFilePath = countFilePath + '.tmp'
+
+        # Create the count file, removing the temporary file if writing it fails
+        try:
+            with open(temporaryCountFilePath, 'w', encoding='utf-8') as countFile:
+
+                # Write the total counts in order of ngram length
+                for ngramLength, count in sorted(countDict.items()):
+                    countFile.write('{:<10}    {:d}\n'.format('#{}'.format(ngramLength), count))
+
+                # Write the ngram dict in order of descending count, then ngram
+                for ngram, count in sorted(ngramDict.items(), key=lambda item: (-item[1], item[0])):
+                    countFile.write('{:<10}    {:d}\n'.format(ngram, count))
+
+            # Move the count file into place
+            os.replace(temporaryCountFilePath, countFilePath)
+
+        finally:
+            if os.path.exists(temporaryCountFilePath):
+                os.remove(temporaryCountFilePath)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   readCountFile()
+    #
+    #   Purpose:    Read a raw count ngram dict from a count file, checking
+    #               the counts against the total count for each ngram length
+    #
+    #   Called by:   
+    #
+    #   Parameters: countFilePath       the count file path
+    #
+    #   Exceptions: ValueError      if the count file path is invalid
+    #               ValueError      if there is an invalid entry in the count file
+    #               ValueError      if the counts don't add up to the total counts
+    #
+    #   Returns:   the ngram dict
+    #
+    @staticmethod
+    def readCountFile(countFilePath):
+
+        # Check parameters
+        if not countFilePath:
+            raise ValueError('Invalid count file path')
+
+
+        # Ngram dict
+        ngramDict = dict()
+
+        # Total count dict, total count keyed by ngram length, as read from the count file
+        totalCountDict = dict()
+
+        # Count dict, total count keyed by ngram length, as added up from the ngrams
+        countDict = dict()
+
+        # Open, read and close the count file
+        with open(countFilePath, encoding='utf-8') as countFile:
+            for lineNumber, line in enumerate(countFile, 1):
+
+                # Parse the line
+                fieldList = line.split()
+                if len(fieldList) != 2 or not fieldList[1].isdigit():
+                    raise ValueError('Invalid count file: \'{}\', invalid count entry: \'{}\', line: {}'.format(countFilePath, line.strip(), lineNumber))
+
+                # Get the ngram and the count
+                ngram = fieldList[0]
+                count = int(fieldList[1])
+
+                # Total count for an ngram length
+                if ngram.startswith('#'):
+                    if not ngram[1:].isdigit():
+                        raise ValueError('Invalid count file: \'{}\', invalid total count entry: \'{}\', line: {}'.format(countFilePath, line.strip(), lineNumber))
+                    totalCountDict[int(ngram[1:])] = count
+
+                # Add the ngram and the count to the ngram dict, and the count to the total
+                else:
+                    ngramDict[ngram] = count
+                    ngramLength = len(ngram.replace('$', ''))
+                    countDict[ngramLength] = countDict.get(ngramLength, 0) + count
+
+
+        # Check the counts against the total counts
+        if countDict != totalCountDict:
+            raise ValueError('Invalid count file: \'{}\', the counts don\'t add up to the total counts'.format(countFilePath))
+
+
+        # Return the ngram dict
+        return ngramDict
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   mergeNgramDict()
+    #
+    #   Purpose:    Merge raw counts into a raw count ngram dict
+    #
+    #   Called by:   
+    #
+    #   Parameters: ngramDict           the ngram dict, raw counts
+    #               deltaNgramDict      the ngram dict to merge in, raw counts
+    #
+    #   Exceptions: 
+    #
+    #   Returns:   the same ngram dict
+    #
+    @staticmethod
+    def mergeNgramDict(ngramDict, deltaNgramDict):
+
+        # Add the counts
+        for ngram, count in deltaNgramDict.items():
+            ngramDict[ngram] = ngramDict.get(ngram, 0) + count
+
+        # Return the ngram dict
+        return ngramDict
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Class:      LanguageIdentifier
+#
+#   Purpose:    Language identifier
+#
+#               Scoring, identifying and segmenting keep all their working state
+#               in local variables and only read the language identifier, so 
+#               one language identifier can be shared between threads, freeze() 
+#               makes sure it is not changed once it is shared
+#
+class LanguageIdentifier(object):
+
+    # Ngram file name extension
+    NGRAM_FILE_NAME_EXTENSION = '.txt'
+
+    # Count file name extension
+    COUNT_FILE_NAME_EXTENSION = '.counts'
+    
+    # Hint multiplier (10%)
+    HINT_MULTIPLIER = 0.10
+
+    # Unknown language, returned when the top language does not reach the minimum share
+    UNKNOWN_LANGUAGE = 'unknown'
+
+    # Result version, part of the fingerprint, changed when the shares are computed 
+    # differently so results cached with the previous shares are not used
+    RESULT_VERSION = 2
+
+    # Cascade margin (75%), the top two word scores need to be at least this far 
+    # apart, relative to the top word score, for the word scores to be decisive
+    CASCADE_MARGIN = 0.75
+
+    # Family count, number of families the languages are clustered into
+    FAMILY_COUNT = 32
+
+    # Family top k, number of top scoring families whose languages get scored
+    FAMILY_TOP_K = 2
+
+    # Segment window length, in terms
+    SEGMENT_WINDOW_LENGTH = 10
+
+    # Segment score epsilon, window scores below this are left over from rounding
+    SEGMENT_SCORE_EPSILON = 1e-9
+
+    # Segment term cache size, number of term scores cached while segmenting
+    SEGMENT_TERM_CACHE_SIZE = 100000
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     __init__
+    #   
+    #   Purpose:    Constructor
+    #
+    #   Parameters: ngramDirectoryPath      ngram directory path
+    #               ngramFileNameExtension  ngram file name extension (optional)
+    #               hintMultiplier          hint multiplier (optional)
+    #               cascadeMargin           cascade margin, texts are first scored on their 
+    #                                       short words alone, and only scored on all their 
+    #                                       ngrams if the top two word scores are closer than 
+    #                                       this, no cascade if not set (optional)
+    #               loadThreadCount         number of threads reading the ngram files, defaults to 
+    #                                       the load thread count on free threaded Python, and to 
+    #                                       reading them one at a time otherwise (optional)
+    #               quantized               quantize the ngrams, see Ngram() (optional)
+    #               compiled                compile the ngrams of all the languages into 
+    #                                       the ngram index, see _compileNgramIndex() (optional)
+    #               familyFilePath          family file path, texts are scored against the 
+    #                                       family centroids first, and then only against the 
+    #                                       languages in the top families, see createFamilyFile() (optional)
+    #               familyTopK              number of top families whose languages get scored (optional)
+    #
+    #   Exceptions: ValueError      if the ngram directory path is invalid
+    #               ValueError      if no ngram files were found
+    #               ValueError      if there is an invalid entry in an ngram file
+    #               ValueError      if there is an invalid entry in the family file
+    #
+    def __init__(self, ngramDirectoryPath, ngramFileNameExtension=NGRAM_FILE_NAME_EXTENSION, 
+            hintMultiplier=HINT_MULTIPLIER, cascadeMargin=None, loadThreadCount=None, quantized=False, compiled=False, 
+            familyFilePath=None, familyTopK=FAMILY_TOP_K):
+
+        # Check parameters
+        if not ngramDirectoryPath:
+            raise ValueError('Invalid ngram directory path')
+
+
+        # Set the instance variables
+        self.frozen = False
+        self.ngramDirectoryPath = ngramDirectoryPath
+        self.ngramFileNameExtension = ngramFileNameExtension
+        self.ngramMaximumLength = 0
+        self.languageNgramList = list()
+        self.hintMultiplier = hintMultiplier
+        self.cascadeMargin = cascadeMargin
+        self.quantized = quantized
+        self.ngramIndexDict = None
+        self.familyList = None
+        self.familyTopK = familyTopK
+        self.modelFingerprint = None
+        self.loadTime = 0
+
+        # Start time, to time the load
+        startTime = time.perf_counter()
+
+        
+        # Ngram file path list, tuple of language and file path
+        ngramFilePathList = list()
+
+        # Create the match regex for filtering file names,
+        # matching the following formats:
+        #
+        #	en.txt
+        #	en_US.txt
+        #	zh-hans.txt
+        #	zh-hans_CN.txt
+        #   
+        ngramFileNameMatchRegex = re.compile(r'^(\w{{2}}|\w{{2}}_\w{{2}}|\w{{2}}-\w{{4}}|\w{{2}}-\w{{4}}_\w{{2}})\{}$'.format(self.ngramFileNameExtension))
+
+        # Walk over the the text directory
+        for dirname, dirnames, filenames in os.walk(self.ngramDirectoryPath):
+    
+            # Walk over the files names
+            for filename in filenames:
+
+                # Match on the file name
+                matcher = ngramFileNameMatchRegex.match(filename)
+                    
+                # Skip over file names that don't match the regex
+                if not matcher:
+                    continue
+                
+                # Set the language from the ngram file name
+                language = matcher.group(1)
+                        
+                # Create the text file path
+                ngramFilePath = os.path.join(dirname, filename)
+        
+                # Add the language and ngram file path to the ngram file path list
+                ngramFilePathList.append((language, ngramFilePath,))
+
+
+        # Check that we got ngram files
+        if len(ngramFilePathList) == 0:
+            raise ValueError('Failed to find any ngram files in the ngram directory: \'{}\''.format(self.ngramDirectoryPath))
+
+    
+        # Intern dict, shared between the language ngrams if they are quantized
+        internDict = dict() if self.quantized else None
+
+        # Default the load thread count, reading the ngram files concurrently only pays 
+        # off when the GIL is disabled, the GIL is always enabled before Python 3.13
+        if loadThreadCount is None:
+            gilEnabled = sys._is_gil_enabled() if hasattr(sys, '_is_gil_enabled') else True
+            loadThreadCount = 1 if gilEnabled else LOAD_THREAD_COUNT
+
+        # Create a new language ngram object for each ngram file path/language combination,
+        # reading the ngram files concurrently if needed, in ngram file path list order
+        if loadThreadCount > 1 and len(ngramFilePathList) > 1:
+            import concurrent.futures
+            import functools
+            createNgram = functools.partial(Ngram, quantized=self.quantized, internDict=internDict)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=loadThreadCount) as executor:
+                languageNgramList = list(executor.map(createNgram, *zip(*ngramFilePathList)))
+        else:
+            languageNgramList = [Ngram(language, ngramFilePath, self.quantized, internDict) for language, ngramFilePath in ngramFilePathList]
+
+
+        # Loop over the language ngram list
+        for languageNgram in languageNgramList:
+            
+            # Update the ngram maximum length
+            self.ngramMaximumLength = max(self.ngramMaximumLength, languageNgram.ngramMaximumLength)
+            
+            # And append the language ngram to the language ngram list
+            self.languageNgramList.append(languageNgram)
+
+
+        # Compile the ngram index if needed
+        if compiled:
+            self._compileNgramIndex()
+
+        # Read the family file if needed
+        if familyFilePath:
+            self._readFamilyFile(familyFilePath)
+
+        # Set the load time
+        self.loadTime = time.perf_counter() - startTime
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     freeze
+    #   
+    #   Purpose:    Freeze the language identifier and its language ngrams, so 
+    #               their attributes can no longer be set, the fingerprint is set 
+    #               here since it is otherwise set the first time it is asked for
+    #
+    #               The ngram dicts are not copied into read only mappings, looking 
+    #               up through those is slower, and nothing changes them once loaded
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the language identifier
+    #
+    def freeze(self):
+
+        # Set the fingerprint
+        self.getFingerprint()
+
+        # Freeze the language ngrams
+        for languageNgram in self.languageNgramList:
+            languageNgram.freeze()
+        self.languageNgramList = tuple(self.languageNgramList)
+
+        # Freeze the language identifier
+        self.frozen = True
+
+        # Return the language identifier
+        return self
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     __setattr__
+    #
+    #   Purpose:    Set an attribute, unless the language identifier is frozen
+    #
+    #   Parameters: name            attribute name
+    #               value           attribute value
+    #
+    #   Exceptions: AttributeError  if the language identifier is frozen
+    #
+    #   Returns:    
+    #
+    def __setattr__(self, name, value):
+
+        # Check that the language identifier is not frozen
+        if self.__dict__.get('frozen'):
+            raise AttributeError('Frozen language identifier, can\'t set: \'{}\''.format(name))
+
+        # Set the attribute
+        object.__setattr__(self, name, value)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _compileNgramIndex
+    #   
+    #   Purpose:    Compile the ngrams of all the languages into the ngram index, 
+    #               which holds the weight of an ngram for every language that has 
+    #               it, so a text ngram is looked up once rather than once per 
+    #               language, and a text ngram no language has is dropped there
+    #
+    #               This takes the place of a trie, walking a trie one character 
+    #               at a time is a lot slower in Python than slicing the ngrams 
+    #               out of the terms and hashing them
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    
+    #
+    def _compileNgramIndex(self):
+
+        # Ngram posting dict, list of tuple of language index and weight keyed by ngram
+        ngramPostingDict = dict()
+
+        # Loop over the language ngrams, adding their ngrams to the ngram posting dict
+        for languageIndex, languageNgram in enumerate(self.languageNgramList):
+            for ngram, weight in languageNgram.ngramDict.items():
+                ngramPostingDict.setdefault(ngram, list()).append((languageIndex, weight,))
+
+        # Set the ngram index dict, tuple of ngram length and posting tuple keyed by ngram
+        self.ngramIndexDict = {ngram: (len(ngram) - ngram.count('$'), tuple(postingList),) 
+                for ngram, postingList in ngramPostingDict.items()}
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _scoreNgramIndex
+    #   
+    #   Purpose:    Score a text ngram dict against every language at once with 
+    #               the ngram index, the scores for each language are added up in 
+    #               the same order as Ngram.score() so they come out the same
+    #
+    #               Quantized weights are accumulated separately for each ngram 
+    #               length, and only scaled at the end, see Ngram.scoreGrouped()
+    #
+    #   Parameters: textNgramDict   text ngram dict
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the score list, in language ngram list order
+    #
+    def _scoreNgramIndex(self, textNgramDict):
+
+        # Language count
+        languageCount = len(self.languageNgramList)
+
+        # Get the ngram index dict
+        ngramIndexDict = self.ngramIndexDict
+
+
+        # Score the ngrams
+        if not self.quantized:
+
+            # The score list
+            scoreList = [0] * languageCount
+
+            # Loop over all the text ngrams in the text ngram dict,
+            # and increment the score for each language that has the ngram
+            for textNgram, textFrequency in textNgramDict.items():
+                ngramIndex = ngramIndexDict.get(textNgram)
+                if ngramIndex:
+                    for languageIndex, weight in ngramIndex[1]:
+                        scoreList[languageIndex] += weight * textFrequency
+
+            # Return the score list
+            return scoreList
+
+
+        # Length score dict, integer score list keyed by ngram length
+        lengthScoreDict = dict()
+
+        # Loop over all the text ngrams in the text ngram dict, and increment the 
+        # integer score for the ngram length for each language that has the ngram
+        for textNgram, textFrequency in textNgramDict.items():
+            ngramIndex = ngramIndexDict.get(textNgram)
+            if ngramIndex:
+                ngramLength, postingTuple = ngramIndex
+                lengthScoreList = lengthScoreDict.get(ngramLength)
+                if lengthScoreList is None:
+                    lengthScoreList = lengthScoreDict[ngramLength] = [0] * languageCount
+                for languageIndex, weight in postingTuple:
+                    lengthScoreList[languageIndex] += weight * textFrequency
+
+        # The score list, scaling the integer scores for each language
+        scoreList = [0] * languageCount
+        for ngramLength, lengthScoreList in lengthScoreDict.items():
+            for languageIndex, lengthScore in enumerate(lengthScoreList):
+                if lengthScore:
+                    scoreList[languageIndex] += self.languageNgramList[languageIndex].ngramScaleDict[ngramLength] * lengthScore
+
+        # Return the score list
+        return scoreList
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     clusterFamilies
+    #   
+    #   Purpose:    Cluster the languages into families of similar languages, 
+    #               such as bs, hr and sr, merging the two most similar families 
+    #               until there are only the family count left, starting with 
+    #               one family per language
+    #
+    #               Languages are compared on the cosine similarity of their 
+    #               normalized frequencies, and families on the average similarity
+    #               between their languages (average linkage)
+    #
+    #   Parameters: familyCount     family count
+    #
+    #   Exceptions: ValueError      if the family count is invalid
+    #
+    #   Returns:    the family list, list of the languages in each family, sorted
+    #
+    def clusterFamilies(self, familyCount=FAMILY_COUNT):
+
+        # Check parameters
+        if not familyCount or familyCount < 1:
+            raise ValueError('Invalid family count')
+
+
+        # Language list, normalized frequency dicts, and their norms, in language order
+        languageNgramList = sorted(self.languageNgramList, key=operator.attrgetter('language'))
+        languageList = [languageNgram.language for languageNgram in languageNgramList]
+        frequencyDictList = [languageNgram.getNormalizedFrequencyDict() for languageNgram in languageNgramList]
+        normList = [sum(frequency * frequency for frequency in frequencyDict.values()) ** 0.5 for frequencyDict in frequencyDictList]
+
+        # Similarity dict, cosine similarity keyed by language index pair
+        similarityDict = dict()
+        for firstIndex in range(len(languageList)):
+            for secondIndex in range(firstIndex + 1, len(languageList)):
+                firstDict, secondDict = frequencyDictList[firstIndex], frequencyDictList[secondIndex]
+                if len(firstDict) > len(secondDict):
+                    firstDict, secondDict = secondDict, firstDict
+                dotProduct = sum(frequency * secondDict.get(ngram, 0) for ngram, frequency in firstDict.items())
+                similarityDict[(firstIndex, secondIndex,)] = dotProduct / ((normList[firstIndex] * normList[secondIndex]) or 1)
+
+
+        # Family list, list of language indices, one family per language to start with
+        familyList = [[languageIndex] for languageIndex in range(len(languageList))]
+
+        # Merge the two most similar families until there are only the family count left
+        while len(familyList) > familyCount:
+
+            # Find the two most similar families, on the average similarity between their languages
+            bestSimilarity = None
+            for firstFamilyIndex in range(len(familyList)):
+                for secondFamilyIndex in range(firstFamilyIndex + 1, len(familyList)):
+                    similarity = sum(similarityDict[(min(firstIndex, secondIndex), max(firstIndex, secondIndex),)] 
+                            for firstIndex in familyList[firstFamilyIndex] for secondIndex in familyList[secondFamilyIndex])
+                    similarity /= len(familyList[firstFamilyIndex]) * len(familyList[secondFamilyIndex])
+                    if bestSimilarity is None or similarity > bestSimilarity:
+                        bestSimilarity, bestFirstFamilyIndex, bestSecondFamilyIndex = similarity, firstFamilyIndex, secondFamilyIndex
+
+            # Merge them
+            familyList[bestFirstFamilyIndex].extend(familyList.pop(bestSecondFamilyIndex))
+
+
+        # Return the family list, sorted
+        return sorted(sorted(languageList[languageIndex] for languageIndex in family) for family in familyList)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _readFamilyFile
+    #   
+    #   Purpose:    Read the family file, one family per line with its languages 
+    #               separated by whitespace, and create the centroid for each 
+    #               family, the average of the normalized frequencies of its 
+    #               languages, languages not in the family file get their own family
+    #
+    #   Parameters: familyFilePath  family file path
+    #
+    #   Exceptions: ValueError      if there is an invalid entry in the family file
+    #
+    #   Returns:    
+    #
+    def _readFamilyFile(self, familyFilePath):
+
+        # Language ngram dict, language ngram keyed by language
+        languageNgramDict = {languageNgram.language: languageNgram for languageNgram in self.languageNgramList}
+
+        # Family language list, list of the languages in each family, and family language set, the languages listed so far
+        familyLanguageList = list()
+        familyLanguageSet = set()
+
+        # Open, read and close the family file
+        familyFile = open(familyFilePath, encoding='utf-8')
+        lineList = familyFile.read().splitlines()
+        familyFile.close()
+
+        # Read the lines, skipping over blank lines
+        for line in lineList:
+            languageList = line.split()
+            if not languageList:
+                continue
+            for language in languageList:
+                if language not in languageNgramDict:
+                    raise ValueError('Invalid family file: \'{}\', unknown language: \'{}\', in family entry: \'{}\''.format(familyFilePath, language, line.strip()))
+                if language in familyLanguageSet:
+                    raise ValueError('Invalid family file: \'{}\', language: \'{}\' listed more than once, in family entry: \'{}\''.format(familyFilePath, language, line.strip()))
+                familyLanguageSet.add(language)
+            familyLanguageList.append(languageList)
+
+        # Add the languages not in the family file, each in their own family
+        familyLanguageList.extend([language] for language in languageNgramDict if language not in familyLanguageSet)
+
+
+        # Family list, tuple of centroid dict and family ngram list, the centroid dict is not set for a single language
+        self.familyList = list()
+
+        # Loop over the families, creating their centroids, languages in their own family don't need one
+        for languageList in familyLanguageList:
+            familyNgramList = [languageNgramDict[language] for language in languageList]
+            if len(familyNgramList) == 1:
+                self.familyList.append((None, familyNgramList,))
+                continue
+            centroidDict = dict()
+            for languageNgram in familyNgramList:
+                for ngram, frequency in languageNgram.getNormalizedFrequencyDict().items():
+                    centroidDict[ngram] = centroidDict.get(ngram, 0) + frequency / len(familyNgramList)
+            self.familyList.append((centroidDict, familyNgramList,))
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _scoreFamilies
+    #   
+    #   Purpose:    Get the scores for a text ngram dict from the languages in the 
+    #               families whose centroids score highest, the other languages 
+    #               are not scored, languages in their own family have no centroid 
+    #               and are scored directly
+    #
+    #   Parameters: textNgramDict   text ngram dict
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #
+    #   Exceptions: ValueError      if the text ngram dict is invalid
+    #
+    #   Returns:    the score list, tuple of language and score, unsorted
+    #
+    def _scoreFamilies(self, textNgramDict, hint, hintMultiplier):
+
+        # Check parameters
+        if not textNgramDict:
+            raise ValueError('Invalid text ngram dict')
+
+
+        # Group the text ngram dict by ngram length once if the ngrams are quantized
+        textNgramGroupDict = Ngram.groupNgramDict(textNgramDict) if self.quantized else None
+
+        # Score function for a language ngram
+        def scoreLanguageNgram(languageNgram):
+            if textNgramGroupDict:
+                return languageNgram.scoreGrouped(textNgramGroupDict)
+            return languageNgram.score(textNgramDict=textNgramDict)
+
+
+        # Language score dict, score keyed by language ngram, and family score list, tuple of family score and family ngram list
+        languageScoreDict = dict()
+        familyScoreList = list()
+
+        # Loop over the families, scoring their centroids, or their language if there is no centroid
+        for centroidDict, familyNgramList in self.familyList:
+            if centroidDict is None:
+                familyScore = languageScoreDict[familyNgramList[0]] = scoreLanguageNgram(familyNgramList[0])
+            else:
+                familyScore = 0
+                for textNgram, textFrequency in textNgramDict.items():
+                    frequency = centroidDict.get(textNgram)
+                    if frequency:
+                        familyScore += frequency * textFrequency
+            familyScoreList.append((familyScore, familyNgramList,))
+
+        # Always score the hinted language along with the top families
+        hintNgramList = [languageNgram for languageNgram in self.languageNgramList if languageNgram.language == hint]
+
+        # Loop over the languages in the top families, and the hinted language, scoring the ones not already scored
+        for familyScore, familyNgramList in heapq.nlargest(self.familyTopK, familyScoreList, key=operator.itemgetter(0)) + [(0, hintNgramList,)]:
+            for languageNgram in familyNgramList:
+                if languageNgram not in languageScoreDict:
+                    languageScoreDict[languageNgram] = scoreLanguageNgram(languageNgram)
+
+
+        # Return the score list, only the meaningful scores
+        return [(languageNgram.language, score * self._hintFactor(languageNgram.language, hint, hintMultiplier),) 
+                for languageNgram, score in languageScoreDict.items() if score]
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     getFingerprint
+    #   
+    #   Purpose:    Get the fingerprint for this language identifier, derived 
+    #               from the content of the ngram files and the settings which 
+    #               change the scores, along with the passed identify settings, 
+    #               the ngram files are only hashed the first time around
+    #
+    #   Parameters: settings        identify settings, such as the hint and top k (optional)
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the fingerprint, a hex string
+    #
+    def getFingerprint(self, *settings):
+
+        # Hash the ngram files if needed, in language order so the fingerprint 
+        # does not depend on the order the ngram files were found in
+        if not self.modelFingerprint:
+            import hashlib
+            modelHash = hashlib.sha256()
+            for languageNgram in sorted(self.languageNgramList, key=operator.attrgetter('language')):
+                modelHash.update(languageNgram.language.encode('utf-8') + b'\0')
+                with open(languageNgram.ngramFilePath, 'rb') as ngramFile:
+                    modelHash.update(ngramFile.read())
+            modelHash.update(repr((LanguageIdentifier.RESULT_VERSION, self.quantized, self.cascadeMargin, self.familyTopK if self.familyList else None, 
+                    [[languageNgram.language for languageNgram in familyNgramList] for centroidDict, familyNgramList in self.familyList or []],)).encode('utf-8'))
+            self.modelFingerprint = modelHash.hexdigest()
+
+        # Return the model fingerprint if there are no identify settings
+        if not settings:
+            return self.modelFingerprint
+
+        # Return the fingerprint with the identify settings
+        import hashlib
+        return hashlib.sha256((self.modelFingerprint + repr(settings)).encode('utf-8')).hexdigest()
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     getStatistics
+    #   
+    #   Purpose:    Get the statistics for this language identifier, the 
+    #               statistics for each language, and their totals
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the statistics dict, the language statistics list holds 
+    #               the statistics dict for each language, see Ngram.getStatistics()
+    #
+    def getStatistics(self):
+
+        # Ids of the keys and values already counted, shared between the languages
+        seenIdSet = set()
+
+        # Language statistics list
+        languageStatisticsList = [languageNgram.getStatistics(seenIdSet) for languageNgram in self.languageNgramList]
+
+
+        # Total ngram length count dict and representation dict
+        ngramLengthCountDict = dict()
+        representationDict = dict()
+
+        # Loop over the language statistics, adding up the totals
+        for languageStatistics in languageStatisticsList:
+
+            # Add up the number of ngrams per ngram length
+            for ngramLength, ngramCount in languageStatistics['ngramLengthCountDict'].items():
+                ngramLengthCountDict[ngramLength] = ngramLengthCountDict.get(ngramLength, 0) + ngramCount
+
+            # Add up the bytes used per representation
+            for representation, bytesDict in languageStatistics['representationDict'].items():
+                totalBytesDict = representationDict.setdefault(representation, dict())
+                for name, byteCount in bytesDict.items():
+                    totalBytesDict[name] = totalBytesDict.get(name, 0) + byteCount
+
+        # Add the bytes used by the ngram index, which is shared between the languages,
+        # the values are counted with their posting tuples
+        if self.ngramIndexDict:
+            valueDict = {id(ngramIndex): ngramIndex for ngramIndex in self.ngramIndexDict.values()}
+            indexBytesDict = Ngram._getDictBytes(self.ngramIndexDict, seenIdSet)
+            indexBytesDict['valueBytes'] += sum(sys.getsizeof(ngramIndex[1]) + sum(sys.getsizeof(posting) for posting in ngramIndex[1]) 
+                    for ngramIndex in valueDict.values())
+            indexBytesDict['totalBytes'] = indexBytesDict['dictBytes'] + indexBytesDict['keyBytes'] + indexBytesDict['valueBytes']
+            representationDict['ngramIndexDict'] = indexBytesDict
+
+        # Add the bytes used by the family centroids, which are shared between the languages in each family
+        if self.familyList:
+            centroidBytesDict = dict()
+            for centroidDict, familyNgramList in self.familyList:
+                for name, byteCount in Ngram._getDictBytes(centroidDict or {}, seenIdSet).items():
+                    centroidBytesDict[name] = centroidBytesDict.get(name, 0) + byteCount
+            representationDict['centroidDict'] = centroidBytesDict
+
+
+        # Return the statistics dict
+        return {'languageCount': len(languageStatisticsList), 
+                'quantized': self.quantized,
+                'ngramCount': sum(languageStatistics['ngramCount'] for languageStatistics in languageStatisticsList),
+                'ngramLengthCountDict': ngramLengthCountDict, 
+                'loadTime': self.loadTime, 
+                'representationDict': representationDict,
+                'languageStatisticsList': languageStatisticsList}
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     score
+    #   
+    #   Purpose:    Get the scores for a piece of text
+    #
+    #   Parameters: text            text
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #               topK            number of top scores to return (optional)
+    #               textNgramDict   text ngram dict, in place of the text (optional)
+    #               pruned          prune the languages that can't reach the top scores, 
+    #                               needs the top k, off by default since the score upper 
+    #                               bounds are loose enough that it is usually slower than 
+    #                               scoring every language, see benchmarkPruningFromFiles() (optional)
+    #
+    #   Exceptions: ValueError      if the text/text ngram dict is invalid
+    #
+    #   Returns:    the score list, tuple of language and score, in order of descending score
+    #
+    def score(self, text, hint=None, hintMultiplier=HINT_MULTIPLIER, topK=None, textNgramDict=None, pruned=False):
+
+        # Check parameters
+        if not text and not textNgramDict:
+            raise ValueError('Invalid text/text ngram dict')
+        elif text and textNgramDict:
+            raise ValueError('Invalid text/text ngram dict')
+
+        
+        # Return the word scores if they are decisive
+        if text and self.cascadeMargin:
+            scoreList = self._scoreCascade(text, hint, hintMultiplier)
+            if scoreList:
+                return LanguageIdentifier._rankScoreList(scoreList, topK)
+
+        # Extract the ngram dict from the text if needed
+        if text:
+            textNgramDict = Ngram.extractNgramDict(text, ngramMaximumLength=self.ngramMaximumLength)
+        
+        # Get the top scores, pruning the languages that can't make it if requested, 
+        # scoring every language with the ngram index is cheaper than that,
+        # and the families already cut down the languages scored
+        if pruned and topK and not self.ngramIndexDict and not self.familyList:
+            scoreList = self._scoreTextNgramDictTopK(textNgramDict, hint, hintMultiplier, topK)
+
+        # Get the score list
+        else:
+            scoreList = self._scoreTextNgramDict(textNgramDict, hint, hintMultiplier)
+
+        # And return the ranked score list
+        return LanguageIdentifier._rankScoreList(scoreList, topK)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     identify
+    #   
+    #   Purpose:    Identify a piece of text, returning the scores along with 
+    #               the share for each language, the share of the top language 
+    #               is its margin over the runner up relative to its score, 
+    #               (top score - runner up score) / top score, from 0 for a tie
+    #               to 1 when no other language scored, the other languages 
+    #               have a share of 0
+    #
+    #   Parameters: text            text
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #               topK            number of top scores to return (optional)
+    #               minimumShare    minimum share the top language needs for 
+    #                               the scores to be returned (optional)
+    #               textNgramDict   text ngram dict, in place of the text (optional)
+    #
+    #   Exceptions: ValueError      if the text/text ngram dict is invalid
+    #               ValueError      if the top k is invalid
+    #               ValueError      if the minimum share is invalid
+    #
+    #   Returns:    the score list, tuple of language, score and share, in order of 
+    #               descending score, the unknown language is returned if the top 
+    #               language did not reach the minimum share, the score list is empty 
+    #               if nothing scored, such as when the text has no terms
+    #
+    def identify(self, text, hint=None, hintMultiplier=HINT_MULTIPLIER, topK=None, minimumShare=None, textNgramDict=None):
+
+        # Check parameters
+        if not text and not textNgramDict:
+            raise ValueError('Invalid text/text ngram dict')
+        elif text and textNgramDict:
+            raise ValueError('Invalid text/text ngram dict')
+
+        if topK is not None and topK < 1:
+            raise ValueError('Invalid top k')
+
+        if minimumShare is not None and not 0 <= minimumShare <= 1:
+            raise ValueError('Invalid minimum share')
+
+
+        # Get the word scores if they are decisive
+        scoreList = None
+        if text and self.cascadeMargin:
+            scoreList = self._scoreCascade(text, hint, hintMultiplier)
+
+        # Get the scores from all the ngrams otherwise
+        if not scoreList:
+
+            # Extract the ngram dict from the text if needed
+            if text:
+                textNgramDict = Ngram.extractNgramDict(text, ngramMaximumLength=self.ngramMaximumLength)
+            
+            # Get the score list, there is nothing to score if the text has no terms
+            if textNgramDict:
+                scoreList = self._scoreTextNgramDict(textNgramDict, hint, hintMultiplier)
+
+        # Nothing scored
+        if not scoreList:
+            return list()
+
+
+        # Get the top score and the runner up score, the share is the margin of the top 
+        # language over the runner up, relative to the top score, the other languages have 
+        # no share, the scores of all the languages can't be used since closely related 
+        # languages all score high on the same text
+        topScore, runnerUpScore = (heapq.nlargest(2, (score for language, score in scoreList)) + [0])[:2]
+        topShare = (topScore - runnerUpScore) / topScore
+
+        # The top language did not reach the minimum share
+        if minimumShare and topShare < minimumShare:
+            return [(LanguageIdentifier.UNKNOWN_LANGUAGE, 0, 0,)]
+
+
+        # Rank the score list and add the shares, languages tied for the top have no share either
+        return [(language, score, topShare if score >= topScore else 0,) for language, score in LanguageIdentifier._rankScoreList(scoreList, topK)]
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     identifyBatch
+    #   
+    #   Purpose:    Identify a batch of texts with a pool of threads sharing this
+    #               language identifier, which scales with the number of threads 
+    #               on free threaded Python, and only overlaps with I/O otherwise
+    #
+    #   Parameters: texts           texts, any iterable
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #               topK            number of top scores to return (optional)
+    #               minimumShare    minimum share of the top language (optional)
+    #               threadCount     number of threads (optional)
+    #
+    #   Exceptions: ValueError      if the top k/minimum share is invalid
+    #
+    #   Returns:    the score list for each text, in text order, see identify(), 
+    #               the unknown language is returned for texts without any terms
+    #
+    def identifyBatch(self, texts, hint=None, hintMultiplier=HINT_MULTIPLIER, topK=None, minimumShare=None, threadCount=THREAD_COUNT):
+
+        # Identify a text, empty texts and texts without any terms can't be identified, 
+        # invalid parameters are still raised
+        def identifyText(text):
+            scoreList = self.identify(text, hint, hintMultiplier, topK, minimumShare) if text else None
+            return scoreList or [(LanguageIdentifier.UNKNOWN_LANGUAGE, 0, 0,)]
+
+        # Identify the texts in this thread if there is only one thread
+        if not threadCount or threadCount <= 1:
+            return [identifyText(text) for text in texts]
+
+        # Imported here, only needed when identifying with threads
+        import concurrent.futures
+
+        # Identify the texts with a pool of threads, in text order
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threadCount) as executor:
+            return list(executor.map(identifyText, texts))
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     segment
+    #   
+    #   Purpose:    Segment a piece of text into language spans
+    #
+    #               A window of terms slides over the text one term at a time, and 
+    #               the center term of each window is labeled with the language that 
+    #               scores highest over the window. The window scores are updated
+    #               incrementally, adding the scores of the incoming term and 
+    #               subtracting the scores of the outgoing term, so the cost is 
+    #               linear in the length of the text rather than in the length 
+    #               of the text times the window length.
+    #
+    #   Parameters: text            text
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #               windowLength    window length in terms (optional)
+    #
+    #   Exceptions: ValueError      if the text is invalid
+    #               ValueError      if the window length is invalid
+    #
+    #   Returns:    the span list, tuple of language, start offset and end offset 
+    #               in the text, the unknown language is used for spans no
+    #               language scored on
+    #
+    def segment(self, text, hint=None, hintMultiplier=HINT_MULTIPLIER, windowLength=SEGMENT_WINDOW_LENGTH):
+
+        # Check parameters
+        if not text:
+            raise ValueError('Invalid text')
+
+        if not windowLength or windowLength < 1:
+            raise ValueError('Invalid window length')
+
+
+        # Term list, tuple of term, start offset and end offset
+        termList = [(match.group(0).lower(), match.start(), match.end(),) for match in Ngram.TERM_REGEX.finditer(text)]
+
+        # Nothing to segment
+        if not termList:
+            return list()
+
+
+        # Language list and hint factor list, in language ngram list order
+        languageList = [languageNgram.language for languageNgram in self.languageNgramList]
+        hintFactorList = [self._hintFactor(language, hint, hintMultiplier) for language in languageList]
+
+        # Language index list, used to find the best scoring language
+        languageIndexList = range(len(languageList))
+
+        # Term score dict, language score list keyed by term, caching the 
+        # scores for terms seen before
+        termScoreDict = dict()
+
+        # Shrink the window if there are fewer terms than the window length
+        windowLength = min(windowLength, len(termList))
+
+        # The window score list, the language scores over the current window
+        windowScoreList = [0] * len(languageList)
+
+        # The term language list, the language of each term
+        termLanguageList = [None] * len(termList)
+
+
+        # Loop over each term in the term list, sliding the window along
+        for index, (term, start, end) in enumerate(termList):
+
+            # Add the scores of the incoming term to the window scores
+            windowScoreList = list(map(operator.add, windowScoreList, self._termScoreList(term, termScoreDict, hintFactorList)))
+
+            # Subtract the scores of the outgoing term from the window scores
+            if index >= windowLength:
+                windowScoreList = list(map(operator.sub, windowScoreList, self._termScoreList(termList[index - windowLength][0], termScoreDict, hintFactorList)))
+
+            # Skip until the window is full
+            if index < windowLength - 1:
+                continue
+
+            # Get the best scoring language over the window, ignoring scores that are only
+            # left over from rounding when adding and subtracting scores
+            bestIndex = max(languageIndexList, key=windowScoreList.__getitem__)
+            language = languageList[bestIndex] if windowScoreList[bestIndex] > LanguageIdentifier.SEGMENT_SCORE_EPSILON else LanguageIdentifier.UNKNOWN_LANGUAGE
+
+            # Label the center term of the window
+            termLanguageList[index - windowLength + 1 + (windowLength // 2)] = language
+
+
+        # Label the terms before the first window center and after the last 
+        # window center, they take the language of the nearest window center
+        firstCenter = windowLength // 2
+        lastCenter = len(termList) - windowLength + (windowLength // 2)
+        for index in range(0, firstCenter):
+            termLanguageList[index] = termLanguageList[firstCenter]
+        for index in range(lastCenter + 1, len(termList)):
+            termLanguageList[index] = termLanguageList[lastCenter]
+
+
+        # The span list, tuple of language, start offset and end offset
+        spanList = list()
+
+        # Merge runs of terms in the same language into spans
+        for (term, start, end), language in zip(termList, termLanguageList):
+            if spanList and spanList[-1][0] == language:
+                spanList[-1] = (language, spanList[-1][1], end,)
+            else:
+                spanList.append((language, start, end,))
+
+
+        # Return the span list
+        return spanList
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _termScoreList
+    #   
+    #   Purpose:    Get the language scores for a term
+    #
+    #   Parameters: term            term, downcased
+    #               termScoreDict   term score dict, caching the language scores keyed by term
+    #               hintFactorList  hint factor list, in language ngram list order
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the language score list, in language ngram list order, 
+    #               multiplied by the hint factors
+    #
+    def _termScoreList(self, term, termScoreDict, hintFactorList):
+
+        # Get the term scores from the term score dict
+        termScoreList = termScoreDict.get(term)
+
+        # Score the term if needed
+        if termScoreList is None:
+
+            # Extract the ngram dict from the term
+            termNgramDict = dict()
+            for ngram in Ngram.extractTermNgramList(term, ngramMaximumLength=self.ngramMaximumLength):
+                termNgramDict[ngram] = termNgramDict.get(ngram, 0) + 1
+
+            # Score the term against each language, with the ngram index if there is one
+            if self.ngramIndexDict:
+                termScoreList = [score * hintFactor for score, hintFactor in zip(self._scoreNgramIndex(termNgramDict), hintFactorList)]
+            else:
+                termScoreList = [languageNgram.score(textNgramDict=termNgramDict) * hintFactor 
+                        for languageNgram, hintFactor in zip(self.languageNgramList, hintFactorList)]
+
+            # Cache the term scores, starting over if the cache got too big
+            if len(termScoreDict) >= LanguageIdentifier.SEGMENT_TERM_CACHE_SIZE:
+                termScoreDict.clear()
+            termScoreDict[term] = termScoreList
+
+
+        # Return the term scores
+        return termScoreList
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _scoreTextNgramDict
+    #   
+    #   Purpose:    Get the scores for a text ngram dict
+    #
+    #   Parameters: textNgramDict   text ngram dict
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #               wordsOnly       score against the word ngrams only (optional)
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the score list, tuple of language and score, unsorted
+    #
+    def _scoreTextNgramDict(self, textNgramDict, hint, hintMultiplier, wordsOnly=False):
+
+        # Score with the ngram index if there is one, the word ngrams have the same 
+        # weights in the ngram index as in the word ngram dicts
+        if self.ngramIndexDict:
+            if not textNgramDict:
+                raise ValueError('Invalid text ngram dict')
+            return [(languageNgram.language, score * self._hintFactor(languageNgram.language, hint, hintMultiplier),) 
+                    for languageNgram, score in zip(self.languageNgramList, self._scoreNgramIndex(textNgramDict)) if score]
+
+        # Score the languages in the top families if there are families, the ngram index 
+        # already looks up each text ngram once, and the word ngrams are cheap to score
+        if self.familyList and not wordsOnly:
+            return self._scoreFamilies(textNgramDict, hint, hintMultiplier)
+
+        # The score list, tuple of language and score
+        scoreList = list()
+
+        # Group the text ngram dict by ngram length once if the ngrams are quantized
+        textNgramGroupDict = Ngram.groupNgramDict(textNgramDict) if self.quantized else None
+
+        # Loop over the language ngram list, setting the language 
+        # and score in the score dict
+        for languageNgram in self.languageNgramList:
+            
+            # Get the score
+            if textNgramGroupDict:
+                score = languageNgram.scoreGrouped(textNgramGroupDict, wordsOnly=wordsOnly)
+            else:
+                score = languageNgram.score(textNgramDict=textNgramDict, wordsOnly=wordsOnly)
+        
+            # Set the score dict if the score is meaningful
+            if score:
+
+                # Multiply the score if a hint was provided and the language scored
+                score *= self._hintFactor(languageNgram.language, hint, hintMultiplier)
+        
+                # Set the score dict if the score is meaningful
+                scoreList.append((languageNgram.language, score,))
+
+
+        # Return the score list
+        return scoreList
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _scoreCascade
+    #   
+    #   Purpose:    Get the scores for a piece of text from the first stage of the
+    #               cascade, scoring only the short words in the text against the 
+    #               word ngrams, which is decisive if the top two scores are at 
+    #               least the cascade margin apart
+    #
+    #   Parameters: text            text
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the score list, tuple of language and score, unsorted, 
+    #               None if the word scores were not decisive
+    #
+    def _scoreCascade(self, text, hint, hintMultiplier):
+
+        # Extract the word ngram dict from the text
+        textNgramDict = Ngram.extractWordNgramDict(text, ngramMaximumLength=self.ngramMaximumLength)
+
+        # Not decisive if there are no short words
+        if not textNgramDict:
+            return None
+
+        # Get the score list
+        scoreList = self._scoreTextNgramDict(textNgramDict, hint, hintMultiplier, wordsOnly=True)
+
+        # Not decisive if nothing scored
+        if not scoreList:
+            return None
+
+        # Get the top two scores
+        topScoreList = LanguageIdentifier._rankScoreList(scoreList, 2)
+        topScore = topScoreList[0][1]
+        secondScore = topScoreList[1][1] if len(topScoreList) > 1 else 0
+
+        # Not decisive if the top two scores are too close
+        if (topScore - secondScore) < (self.cascadeMargin * topScore):
+            return None
+
+
+        # Return the score list
+        return scoreList
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _scoreTextNgramDictTopK
+    #   
+    #   Purpose:    Get the top scores for a text ngram dict, languages are scored
+    #               in order of descending score upper bound, and stop being scored 
+    #               as soon as they can no longer reach the top scores (MaxScore)
+    #
+    #   Parameters: textNgramDict   text ngram dict
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #               topK            number of top scores
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the score list, tuple of language and score, unsorted, 
+    #               containing at most topK scores
+    #
+    def _scoreTextNgramDictTopK(self, textNgramDict, hint, hintMultiplier, topK):
+
+        # Group the text ngram dict by ngram length, and get the text ngram length dict,
+        # total text frequency keyed by ngram length
+        textNgramGroupDict = Ngram.groupNgramDict(textNgramDict)
+        textNgramLengthDict = {ngramLength: sum(textNgramLengthGroupDict.values()) 
+                for ngramLength, textNgramLengthGroupDict in textNgramGroupDict.items()}
+
+        # Text ngram group list, tuple of ngram length, text ngram dict and total text frequency, 
+        # in order of ascending ngram length, since there are the fewest distinct short ngrams
+        textNgramGroupList = sorted((ngramLength, textNgramLengthGroupDict, textNgramLengthDict[ngramLength],) 
+                for ngramLength, textNgramLengthGroupDict in textNgramGroupDict.items())
+
+
+        # Score bound list, tuple of score upper bound, hint factor and language ngram
+        scoreBoundList = list()
+
+        # Loop over the language ngram list, getting the score upper bounds
+        for languageNgram in self.languageNgramList:
+            hintFactor = self._hintFactor(languageNgram.language, hint, hintMultiplier)
+            scoreBound = languageNgram.scoreBound(textNgramLengthDict)
+            scoreBoundList.append((scoreBound * hintFactor, hintFactor, languageNgram,))
+
+        # Sort the score bound list in order of descending score upper bound,
+        # so the top scores fill up early and the rest can be pruned
+        scoreBoundList.sort(key=operator.itemgetter(0), reverse=True)
+
+
+        # The score heap, tuple of score and language, the lowest top score first
+        scoreHeap = list()
+
+        # Loop over the score bound list
+        for scoreBound, hintFactor, languageNgram in scoreBoundList:
+
+            # Score the language in full until the top scores fill up
+            if len(scoreHeap) < topK:
+                if self.quantized:
+                    score = languageNgram.scoreGrouped(textNgramGroupDict)
+                else:
+                    score = languageNgram.score(textNgramDict=textNgramDict)
+                if score:
+                    heapq.heappush(scoreHeap, (score * hintFactor, languageNgram.language,))
+                continue
+
+            # Minimum score needed to make it into the top scores
+            minimumScore = scoreHeap[0][0]
+
+            # Stop here if none of the remaining languages can make it into the top scores
+            if scoreBound < minimumScore:
+                break
+
+            # Score the language, giving up once it can no longer make it into the top scores
+            score = languageNgram.scoreBounded(textNgramGroupList, minimumScore / hintFactor, scoreBound / hintFactor)
+            if score and (score * hintFactor) > minimumScore:
+                heapq.heapreplace(scoreHeap, (score * hintFactor, languageNgram.language,))
+
+
+        # Return the score list
+        return [(language, score,) for score, language in scoreHeap]
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _hintFactor
+    #   
+    #   Purpose:    Get the factor to multiply a language score by given the hint
+    #
+    #   Parameters: language        language
+    #               hint            language hint
+    #               hintMultiplier  hint multiplier
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the hint factor
+    #
+    def _hintFactor(self, language, hint, hintMultiplier):
+
+        # Not the hinted language
+        if hint != language:
+            return 1
+
+        # Fall back to the default hint multiplier
+        if not hintMultiplier:
+            hintMultiplier = self.hintMultiplier
+
+        # Return the hint factor
+        return (1 + hintMultiplier) if hintMultiplier else 1
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   _rankScoreList()
+    #   
+    #   Purpose:    Rank the score list, only selecting the top scores 
+    #               with a heap if a number of top scores is passed
+    #
+    #   Parameters: scoreList       score list, tuple of language and score
+    #               topK            number of top scores to return (optional)
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the score list in order of descending score
+    #
+    @staticmethod
+    def _rankScoreList(scoreList, topK=None):
+
+        # Select the top scores, a partial sort is cheaper than a full sort
+        if topK and topK < len(scoreList):
+            return heapq.nlargest(topK, scoreList, key=operator.itemgetter(1))
+
+        # Sort the score list
+        return sorted(scoreList, key=operator.itemgetter(1), reverse=True)
+
+
+
+#--------------------------------------------------------------------------
+#--------------------------------------------------------------------------
+#
+#   Class:      ReloadableLanguageIdentifier
+#
+#   Purpose:    Reloadable language identifier, a handle for long running 
+#               processes which picks up regenerated ngram files without a 
+#               restart
+#
+#               The ngram files are checked for changes at most once per 
+#               check interval, and the new language identifier is created in 
+#               a background thread and swapped in when it is ready, callers 
+#               keep the language identifier they got so they finish on it, 
+#               and a failed reload is logged and kept in the reload error 
+#               while the current language identifier stays in place
+#
+class ReloadableLanguageIdentifier(object):
+
+    # Check interval, in seconds
+    CHECK_INTERVAL = 10
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     __init__
+    #   
+    #   Purpose:    Constructor, creates the first language identifier
+    #
+    #   Parameters: ngramDirectoryPath      ngram directory path
+    #               checkInterval           check interval, in seconds, the ngram files 
+    #                                       are only checked when reload() is called if 
+    #                                       not set (optional)
+    #               languageIdentifierArgs  language identifier arguments, see LanguageIdentifier() (optional)
+    #
+    #   Exceptions: ValueError      if the ngram directory path is invalid
+    #               ValueError      if the first language identifier could not be created
+    #
+    def __init__(self, ngramDirectoryPath, checkInterval=CHECK_INTERVAL, **languageIdentifierArgs):
+
+        # Check parameters
+        if not ngramDirectoryPath:
+            raise ValueError('Invalid ngram directory path')
+
+
+        # Set the instance variables
+        self.ngramDirectoryPath = ngramDirectoryPath
+        self.checkInterval = checkInterval
+        self.languageIdentifierArgs = languageIdentifierArgs
+        self.reloadLock = threading.Lock()
+        self.reloadThread = None
+        self.reloadCount = 0
+        self.reloadError = None
+        self.checkTime = time.monotonic()
+
+        # Create the first language identifier, stamping the ngram files first 
+        # so changes made while it is created are picked up by the next check
+        self.ngramStamp = self._getNgramStamp()
+        self.languageIdentifier = LanguageIdentifier(self.ngramDirectoryPath, **self.languageIdentifierArgs)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     get
+    #   
+    #   Purpose:    Get the current language identifier, checking the ngram 
+    #               files for changes if the check interval has passed
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the language identifier
+    #
+    def get(self):
+
+        # Check the ngram files for changes if the check interval has passed
+        if self.checkInterval and (time.monotonic() - self.checkTime) >= self.checkInterval:
+            self.checkTime = time.monotonic()
+            if self._getNgramStamp() != self.ngramStamp:
+                self.reload()
+
+        # Return the current language identifier
+        return self.languageIdentifier
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     identify
+    #   
+    #   Purpose:    Identify a piece of text with the current language identifier, 
+    #               see LanguageIdentifier.identify()
+    #
+    #   Parameters: args            identify arguments
+    #
+    #   Exceptions: ValueError      if the text/text ngram dict is invalid
+    #
+    #   Returns:    the score list, tuple of language, score and share
+    #
+    def identify(self, *args, **kwargs):
+
+        # Identify with the current language identifier
+        return self.get().identify(*args, **kwargs)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     reload
+    #   
+    #   Purpose:    Reload the language identifier in a background thread, 
+    #               unless a reload is already running
+    #
+    #   Parameters: wait            wait for the reload to finish (optional)
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    True if the language identifier was swapped in when waiting, 
+    #               True if a reload was started when not waiting
+    #
+    def reload(self, wait=False):
+
+        # Start the reload thread unless one is already running
+        with self.reloadLock:
+            started = not (self.reloadThread and self.reloadThread.is_alive())
+            if started:
+                self.reloadThread = threading.Thread(target=self._reload, name='languageIdentifierReload', daemon=True)
+                self.reloadThread.reloaded = False
+                self.reloadThread.start()
+            reloadThread = self.reloadThread
+
+        # Wait for the reload to finish if needed, the reload thread records whether it swapped 
+        # in the language identifier, the reload count could already have moved on before it was read
+        if wait:
+            reloadThread.join()
+            return reloadThread.reloaded
+
+        # Return whether a reload was started
+        return started
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _reload
+    #   
+    #   Purpose:    Reload the language identifier, swapping it in if it was created
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    
+    #
+    def _reload(self):
+
+        # Stamp the ngram files first so changes made while reloading are picked up by the next check
+        ngramStamp = self._getNgramStamp()
+
+        # Create the new language identifier, keeping the current one if that fails 
+        # for whatever reason, since nothing else would report it in this thread
+        try:
+            startTime = time.perf_counter()
+            languageIdentifier = LanguageIdentifier(self.ngramDirectoryPath, **self.languageIdentifierArgs)
+        except Exception as exception:
+            self.reloadError = exception
+            self.ngramStamp = ngramStamp
+            logger.error('Failed to reload the ngram directory: \'%s\', %s', self.ngramDirectoryPath, exception)
+            return
+
+        # Swap in the new language identifier, the assignment is atomic, 
+        # callers holding the current one keep it
+        self.languageIdentifier = languageIdentifier
+        self.reloadCount += 1
+        self.reloadError = None
+        self.ngramStamp = ngramStamp
+        threading.current_thread().reloaded = True
+
+        # Log
+        logger.info('Reloaded the ngram directory: \'%s\', in: %.3f seconds.', self.ngramDirectoryPath, time.perf_counter() - startTime)
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     _getNgramStamp
+    #   
+    #   Purpose:    Get the ngram stamp, the path, modification time and size 
+    #               of the files in the ngram directory, which is a lot cheaper 
+    #               than a fingerprint of their content
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the ngram stamp
+    #
+    def _getNgramStamp(self):
+
+        # Ngram stamp list
+        ngramStampList = list()
+
+        # Walk over the ngram directory, stamping the files
+        for dirname, dirnames, filenames in os.walk(self.ngramDirectoryPath):
+            for filename in filenames:
+                try:
+                    fileStat = os.stat(os.path.join(dirname, filename))
+                except OSError:
+                    continue
+                ngramStampList.append((dirname, filename, fileStat.st_mtime_ns, fileStat.st_size,))
+
+        # Return the ngram stamp
+        return sorted(ngramStampList)
+
+
+
+#--------------------------------------------------------------------------
+#--------------------------------------------------------------------------
+#
+#   Class:      IdentificationCache
+#
+#   Purpose:    Persistent identification cache, keeps the identification 
+#               results in an sqlite database keyed by the hash of the text and 
+#               the fingerprint of the language identifier and identify settings, 
+#               so texts already identified under the same model can be skipped
+#
+#               Results are written, and hits recorded, in batches so the 
+#               database is not committed for each text
+#
+class IdentificationCache(object):
+
+    # Batch size, number of results written and hits recorded per commit
+    BATCH_SIZE = 1000
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     __init__
+    #   
+    #   Purpose:    Constructor, creates the cache file if needed
+    #
+    #   Parameters: cacheFilePath   cache file path
+    #               batchSize       batch size (optional)
+    #
+    #   Exceptions: ValueError      if the cache file path is invalid
+    #               ValueError      if the batch size is invalid
+    #
+    def __init__(self, cacheFilePath, batchSize=BATCH_SIZE):
+
+        # Check parameters
+        if not cacheFilePath:
+            raise ValueError('Invalid cache file path')
+
+        if not batchSize or batchSize < 1:
+            raise ValueError('Invalid batch size')
+
+
+        # Imported here, only needed by the cache
+        import sqlite3
+
+        # Set the instance variables
+        self.cacheFilePath = cacheFilePath
+        self.batchSize = batchSize
+        self.insertList = list()
+        self.hitList = list()
+        self.hitCount = 0
+        self.missCount = 0
+
+        # Open the cache file, and create the result table if needed
+        self.connection = sqlite3.connect(self.cacheFilePath)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS result (textHash BLOB NOT NULL, fingerprint TEXT NOT NULL, '
+                'modelFingerprint TEXT NOT NULL, result TEXT NOT NULL, accessTime REAL NOT NULL, '
+                'PRIMARY KEY (textHash, fingerprint)) WITHOUT ROWID')
+        self.connection.commit()
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Function:   hashText()
+    #   
+    #   Purpose:    Hash the text
+    #
+    #   Parameters: text            text
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the text hash, 16 bytes
+    #
+    @staticmethod
+    def hashText(text):
+
+        # Imported here, only needed by the cache
+        import hashlib
+
+        # Return the text hash
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     get
+    #   
+    #   Purpose:    Get the result for a text hash and fingerprint, recording the hit
+    #
+    #   Parameters: textHash        text hash, see hashText()
+    #               fingerprint     fingerprint, see LanguageIdentifier.getFingerprint()
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the result, None if it is not cached
+    #
+    def get(self, textHash, fingerprint):
+
+        # Look up the result
+        row = self.connection.execute('SELECT result FROM result WHERE textHash = ? AND fingerprint = ?', 
+                (textHash, fingerprint,)).fetchone()
+
+        # Miss
+        if row is None:
+            self.missCount += 1
+            return None
+
+        # Record the hit, so the access time gets updated with the next batch
+        self.hitCount += 1
+        self.hitList.append((time.time(), textHash, fingerprint,))
+        if len(self.hitList) >= self.batchSize:
+            self.flush()
+
+        # Return the result
+        return row[0]
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     put
+    #   
+    #   Purpose:    Put the result for a text hash and fingerprint, the result 
+    #               is written with the next batch
+    #
+    #   Parameters: textHash            text hash, see hashText()
+    #               fingerprint         fingerprint, see LanguageIdentifier.getFingerprint()
+    #               modelFingerprint    model fingerprint, the fingerprint without 
+    #                                   the identify settings, used to evict stale results
+    #               result              result
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    
+    #
+    def put(self, textHash, fingerprint, modelFingerprint, result):
+
+        # Add the result to the batch, writing the batch if it is full
+        self.insertList.append((textHash, fingerprint, modelFingerprint, result, time.time(),))
+        if len(self.insertList) >= self.batchSize:
+            self.flush()
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     flush
+    #   
+    #   Purpose:    Write the results and record the hits in the batch, in one transaction
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    
+    #
+    def flush(self):
+
+        # Write the batch
+        with self.connection:
+            if self.insertList:
+                self.connection.executemany('INSERT OR REPLACE INTO result (textHash, fingerprint, modelFingerprint, result, accessTime) '
+                        'VALUES (?, ?, ?, ?, ?)', self.insertList)
+            if self.hitList:
+                self.connection.executemany('UPDATE result SET accessTime = ? WHERE textHash = ? AND fingerprint = ?', self.hitList)
+
+        # Clear the batch
+        self.insertList.clear()
+        self.hitList.clear()
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     compact
+    #   
+    #   Purpose:    Evict the results left over from other models, and the 
+    #               results not accessed for a while, and compact the cache file
+    #
+    #   Parameters: modelFingerprint    model fingerprint, results from other models 
+    #                                   are evicted (optional)
+    #               maximumAge          maximum age in seconds since a result was 
+    #                                   last accessed, older results are evicted (optional)
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    the number of results evicted
+    #
+    def compact(self, modelFingerprint=None, maximumAge=None):
+
+        # Write the batch first so it gets evicted along with the rest
+        self.flush()
+
+        # Evict the results
+        evictCount = 0
+        with self.connection:
+            if modelFingerprint:
+                evictCount += self.connection.execute('DELETE FROM result WHERE modelFingerprint != ?', (modelFingerprint,)).rowcount
+            if maximumAge is not None:
+                evictCount += self.connection.execute('DELETE FROM result WHERE accessTime < ?', (time.time() - maximumAge,)).rowcount
+
+        # Compact the cache file
+        self.connection.execute('VACUUM')
+
+        # Return the number of results evicted
+        return evictCount
+
+
+
+    #--------------------------------------------------------------------------
+    #
+    #   Method:     close
+    #   
+    #   Purpose:    Write the batch and close the cache file
+    #
+    #   Parameters: 
+    #
+    #   Exceptions: 
+    #
+    #   Returns:    
+    #
+    def close(self):
+
+        # Write the batch and close the cache file
+        self.flush()
+        self.connection.close()
+
+
+
+#--------------------------------------------------------------------------
+#--------------------------------------------------------------------------
+#
+#   Function:   createFromFile()
+#
+#   Purpose:    Create from file
+#
+#   Called by:   
+#
+#   Parameters: textFilePath        the text file path (optional)
+#               textFile            the text file (optional)
+#               ngramFilePath       the ngram file path (optional)
+#               ngramFile           the ngram file (optional)
+#               ngramMaximumLength  the ngram maximum length (optional)
+#               countFilePath       the count file path (optional)
+#
+#   Exceptions: ValueError      if the text file path/text file is invalid
+#               ValueError      if the ngram file path/ngram file is invalid
+#
+#   Returns:   
+#
+def createFromFile(textFilePath=None, textFile=None, ngramFilePath=None, ngramFile=None,
+        ngramMaximumLength=Ngram.NGRAM_MAXIMUM_LENGTH, countFilePath=None):
+
+    # Check parameters
+    if not textFilePath and not textFile:
+        raise ValueError('Invalid text file path/text file')
+    elif textFilePath and textFile:
+        raise ValueError('Invalid text file path/text file')
+   
+    if not ngramFilePath and not ngramFile:
+        raise ValueError('Invalid ngram file path/ngram file')
+    elif ngramFilePath and ngramFile:
+        raise ValueError('Invalid ngram file path/ngram file')
+
+    
+    # Log 
+    if textFilePath and ngramFilePath:
+        logger.info('Processing from: \'%s\', to: \'%s\'.', textFilePath, ngramFilePath)
+    elif textFilePath and not ngramFilePath:
+        logger.info('Processing from: \'%s\', to: \'stdout\'.', textFilePath)
+    elif not textFilePath and ngramFilePath:
+        logger.info('Processing from: \'stdin\', to: \'%s\'.', ngramFilePath)
+    elif not textFilePath and not ngramFilePath:
+        logger.info('Processing from: \'stdin\', to: \'stdout\'.')
+
+
+    # Create the ngram file
+    Ngram.createNgramFile(textFilePath=textFilePath, textFile=textFile, ngramFilePath=ngramFilePath, ngramFile=ngramFile, 
+            ngramMaximumLength=ngramMaximumLength, countFilePath=countFilePath)
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   createFromDirectory()
+#
+#   Purpose:    Create from directory
+#
+#   Called by:   
+#
+#   Parameters: textDirectoryPath       the text directory path
+#               ngramDirectoryPath      the ngram directory path
+#               textFileNameExtension   the text file name extension (optional)
+#               ngramFileNameExtension  the ngram file name extension (optional)
+#               ngramMaximumLength      the ngram maximum length (optional)
+#               countDirectoryPath      the count directory path (optional)
+#               shard                   the shard, tuple of shard index and shard count, 
+#                                       only the text files in the shard are used, keyed by the 
+#                                       text file path relative to the text directory, see parseShard() (optional)
+#
+#   Exceptions: ValueError      if the text directory path is invalid
+#               ValueError      if the ngram directory path is invalid
+#
+#   Returns:   
+#
+def createFromDirectory(textDirectoryPath, ngramDirectoryPath, 
+        textFileNameExtension=TEXT_FILE_NAME_EXTENSION, 
+        ngramFileNameExtension=LanguageIdentifier.NGRAM_FILE_NAME_EXTENSION, 
+        ngramMaximumLength=Ngram.NGRAM_MAXIMUM_LENGTH, countDirectoryPath=None, shard=None):
+
+    # Check parameters
+    if not textDirectoryPath:
+        raise ValueError('Invalid text directory path')
+   
+    if not ngramDirectoryPath:
+        raise ValueError('Invalid ngram directory path')
+   
+  
+    # Create the match regex for filtering text file names,
+    # matching the following formats:
+    #
+    #	en.txt
+    #	en_US.txt
+    #	zh-hans.txt
+    #	zh-hans_CN.txt
+    #	
+    textFileNameMatchRegex = re.compile(r'^(\w{{2}}|\w{{2}}_\w{{2}}|\w{{2}}-\w{{4}}|\w{{2}}-\w{{4}}_\w{{2}})\{}$'.format(textFileNameExtension))
+
+
+    # Walk over the the text directory
+    for dirname, dirnames, filenames in os.walk(textDirectoryPath):
+    
+        # Walk over the files names
+        for filename in filenames:
+        
+            # Skip over file names that don't match the regex
+            if not textFileNameMatchRegex.match(filename):
+                continue
+
+            # Create the text file path
+            textFilePath = os.path.join(dirname, filename)
+
+            # Skip over text files in other shards
+            if shard and getShardIndex(getShardKey(textFilePath, textDirectoryPath), shard[1]) != shard[0]:
+                continue
+        
+            # Create the ngram file name
+            ngramFileName = filename[:-(len(textFileNameExtension))] + ngramFileNameExtension
+
+            # Create the ngram file path
+            ngramFilePath = os.path.join(ngramDirectoryPath, ngramFileName)
+            
+            # Create the count file path if needed
+            countFilePath = None
+            if countDirectoryPath:
+                countFilePath = os.path.join(countDirectoryPath, filename[:-(len(textFileNameExtension))] + LanguageIdentifier.COUNT_FILE_NAME_EXTENSION)
+
+            # Create with the file path
+            createFromFile(textFilePath=textFilePath, ngramFilePath=ngramFilePath, ngramMaximumLength=ngramMaximumLength, 
+                    countFilePath=countFilePath)
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   updateFromFile()
+#
+#   Purpose:    Update a count file with new text and/or other count files,
+#               and optionally regenerate the ngram file from it, the new text
+#               is the only text that gets processed, but the count file is 
+#               read and rewritten in full, so an update costs the size of the 
+#               count file as well as the size of the new text
+#
+#   Called by:   
+#
+#   Parameters: countFilePath           the count file path, created if it does not exist
+#               textFilePath            the text file path (optional)
+#               mergeCountFilePathList  the list of count file paths to merge in (optional)
+#               ngramFilePath           the ngram file path (optional)
+#               ngramMaximumLength      the ngram maximum length (optional)
+#
+#   Exceptions: ValueError      if the count file path is invalid
+#               ValueError      if there is neither a text file path nor count file paths to merge in
+#
+#   Returns:   
+#
+def updateFromFile(countFilePath, textFilePath=None, mergeCountFilePathList=None, ngramFilePath=None, 
+        ngramMaximumLength=Ngram.NGRAM_MAXIMUM_LENGTH):
+
+    # Check parameters
+    if not countFilePath:
+        raise ValueError('Invalid count file path')
+   
+    if not textFilePath and not mergeCountFilePathList:
+        raise ValueError('Invalid text file path/merge count file path list')
+
+
+    # Read the count file if it exists
+    if os.path.exists(countFilePath):
+        ngramDict = Ngram.readCountFile(countFilePath)
+    else:
+        ngramDict = dict()
+
+
+    # Merge in the counts from the text file
+    if textFilePath:
+
+        # Log 
+        logger.info('Updating from: \'%s\', to: \'%s\'.', textFilePath, countFilePath)
+
+        # Open the text file, extract the ngram dict and merge it in, and close the text file
+        textFile = open(textFilePath, encoding='utf-8')
+        Ngram.mergeNgramDict(ngramDict, Ngram.extractNgramDictFromFile(textFile, ngramMaximumLength=ngramMaximumLength))
+        textFile.close()
+
+
+    # Merge in the counts from the count files
+    if mergeCountFilePathList:
+        for mergeCountFilePath in mergeCountFilePathList:
+
+            # Log 
+            logger.info('Merging from: \'%s\', to: \'%s\'.', mergeCountFilePath, countFilePath)
+
+            # Read the count file and merge it in
+            Ngram.mergeNgramDict(ngramDict, Ngram.readCountFile(mergeCountFilePath))
+
+
+    # Write the count file
+    Ngram.writeCountFile(ngramDict, countFilePath)
+
+    # Write the ngram file if needed, normalizing a copy of the counts
+    if ngramFilePath:
+        logger.info('Processing from: \'%s\', to: \'%s\'.', countFilePath, ngramFilePath)
+        Ngram.writeNgramFile(Ngram.normalizeNgramDict(dict(ngramDict), ngramMaximumLength=ngramMaximumLength), ngramFilePath=ngramFilePath)
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   identifyText()
+#
+#   Purpose:    Identify the text
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier  the language identifier
+#               text                the text
+#               hint                the language hint (optional)
+#               hintMultiplier      the hint multiplier (optional)
+#               topK                the number of top scores to list (optional)
+#               minimumShare        the minimum share of the top language (optional)
+#               textNgramDict       the text ngram dict, in place of the text (optional)
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the text/text ngram dict is invalid
+#
+#   Returns:   
+#
+def identifyText(languageIdentifier, text, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, topK=None, minimumShare=None, textNgramDict=None):
+
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+   
+    if not text and not textNgramDict:
+        raise ValueError('Invalid text/text ngram dict')
+
+
+    # Get the scores for the text
+    scoreList = languageIdentifier.identify(text, hint, hintMultiplier, topK, minimumShare, textNgramDict)
+    
+    # List the scores
+    if scoreList:
+        for language, score, share in scoreList:
+            logger.info('{:<10}    {:.10f}    {:.0%}'.format(language, score, share))
+    
+    # Fail
+    else:
+        logger.warn('Could not identify the passed text')
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   identifyTextFromFile()
+#
+#   Purpose:    Identify the text from a file, the file is memory mapped and 
+#               decoded in chunks, so it is never copied into memory in full, 
+#               files which can't be memory mapped, such as pipes, are read 
+#               in chunks instead
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier  the language identifier
+#               textFilePath        the text file path
+#               hint                the language hint (optional)
+#               hintMultiplier      the hint multiplier (optional)
+#               topK                the number of top scores to list (optional)
+#               minimumShare        the minimum share of the top language (optional)
+#               byteBudget          the number of bytes to read from the file (optional)
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the text file path is invalid
+#
+#   Returns:   
+#
+def identifyTextFromFile(languageIdentifier, textFilePath, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, topK=None, minimumShare=None, byteBudget=None):
+
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+   
+    if not textFilePath:
+        raise ValueError('Invalid text file path')
+
+    
+    # Log
+    logger.info('Processing file: \'%s\'', textFilePath)
+
+    # Imported here, only needed when identifying a file
+    import mmap
+    import stat
+
+    # Get the text file status, only regular files with content can be memory mapped, 
+    # pipes such as '/dev/stdin' report no size
+    textFileStat = os.stat(textFilePath)
+
+    # Open the text file, memory map it, extract the ngram dict, and close the text file
+    if stat.S_ISREG(textFileStat.st_mode) and textFileStat.st_size > 0:
+        with open(textFilePath, 'rb') as textFile:
+            with mmap.mmap(textFile.fileno(), 0, access=mmap.ACCESS_READ) as textMap:
+                textNgramDict = Ngram.extractNgramDictFromBytes(textMap, 
+                        ngramMaximumLength=languageIdentifier.ngramMaximumLength, byteBudget=byteBudget)
+
+    # Open the text file, read the byte budget, extract the ngram dict, and close the text file
+    elif byteBudget:
+        with open(textFilePath, 'rb') as textFile:
+            textNgramDict = Ngram.extractNgramDictFromBytes(textFile.read(byteBudget), 
+                    ngramMaximumLength=languageIdentifier.ngramMaximumLength, byteBudget=byteBudget)
+
+    # Open the text file, extract the ngram dict a chunk at a time, and close the text file
+    else:
+        with open(textFilePath, encoding='utf-8') as textFile:
+            textNgramDict = Ngram.extractNgramDictFromFile(textFile, ngramMaximumLength=languageIdentifier.ngramMaximumLength)
+
+    # Identify the text
+    identifyText(languageIdentifier, None, hint, hintMultiplier, topK, minimumShare, textNgramDict)
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   identifyTextFromBytes()
+#
+#   Purpose:    Identify UTF-8 encoded text, such as a message payload, the 
+#               text is decoded in chunks
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier  the language identifier
+#               data                the text data, bytes, bytearray, memoryview or mmap
+#               hint                the language hint (optional)
+#               hintMultiplier      the hint multiplier (optional)
+#               topK                the number of top scores to list (optional)
+#               minimumShare        the minimum share of the top language (optional)
+#               byteBudget          the number of bytes to decode (optional)
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the text data is invalid
+#
+#   Returns:   
+#
+def identifyTextFromBytes(languageIdentifier, data, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, topK=None, minimumShare=None, byteBudget=None):
+
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+   
+    if data is None:
+        raise ValueError('Invalid text data')
+
+
+    # Extract the ngram dict
+    textNgramDict = Ngram.extractNgramDictFromBytes(data, ngramMaximumLength=languageIdentifier.ngramMaximumLength, byteBudget=byteBudget)
+
+    # Identify the text
+    identifyText(languageIdentifier, None, hint, hintMultiplier, topK, minimumShare, textNgramDict)
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   identifyTextFromFiles()
+#
+#   Purpose:    Identify the text from multiple files, writing one result line 
+#               per file, the files are read by a bounded pool of threads so 
+#               reading overlaps with identification, and the result lines 
+#               are written in the order of the text file paths
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier  the language identifier
+#               textFilePaths       the text file paths, any iterable
+#               hint                the language hint (optional)
+#               hintMultiplier      the hint multiplier (optional)
+#               topK                the number of top scores to write (optional)
+#               minimumShare        the minimum share of the top language (optional)
+#               threadCount         the number of threads reading the text files (optional)
+#               textPrefixLength    the number of characters to read from each text file (optional)
+#               resultFile          the file the result lines are written to (optional)
+#               identificationCache the identification cache, text files already identified 
+#                                   with the same model and settings are skipped (optional)
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the text file paths are invalid
+#
+#   Returns:    the number of text files identified
+#
+def identifyTextFromFiles(languageIdentifier, textFilePaths, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, topK=1, minimumShare=None, 
+        threadCount=THREAD_COUNT, textPrefixLength=None, resultFile=None, identificationCache=None):
+
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+   
+    if textFilePaths is None:
+        raise ValueError('Invalid text file paths')
+
+
+    # Write the result lines to stdout by default
+    if not resultFile:
+        resultFile = sys.stdout
+
+    # Start time and the number of text files identified
+    startTime = time.perf_counter()
+    textFileCount = 0
+
+    # Get the fingerprints if there is an identification cache, the text prefix 
+    # length is left out since the text hash already covers it
+    if identificationCache:
+        modelFingerprint = languageIdentifier.getFingerprint()
+        fingerprint = languageIdentifier.getFingerprint(hint, hintMultiplier, topK, minimumShare)
+
+    # Iterator over the text file paths
+    textFilePathIterator = iter(textFilePaths)
+
+    # Read queue, tuple of text file path and future text, bounded to keep 
+    # every thread busy without reading too far ahead
+    readQueue = collections.deque()
+    readQueueLength = max(1, threadCount) * 2
+
+
+    # Imported here, only needed when identifying multiple files
+    import concurrent.futures
+
+    # Read the text files in a thread pool
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, threadCount)) as executor:
+
+        # Loop until all the text files have been identified
+        while True:
+
+            # Queue up text files to read
+            while len(readQueue) < readQueueLength:
+                textFilePath = next(textFilePathIterator, None)
+                if textFilePath is None:
+                    break
+                readQueue.append((textFilePath, executor.submit(readTextFile, textFilePath, textPrefixLength),))
+
+            # Done if there is nothing left to identify
+            if not readQueue:
+                break
+
+            # Get the next text file, waiting for it to be read
+            textFilePath, textFuture = readQueue.popleft()
+            try:
+                text = textFuture.result()
+            except (OSError, UnicodeDecodeError) as exception:
+                logger.error('Failed to read file: \'%s\', %s', textFilePath, exception)
+                continue
+
+            # Get the result from the identification cache if it is there
+            result = None
+            if identificationCache:
+                textHash = IdentificationCache.hashText(text)
+                result = identificationCache.get(textHash, fingerprint)
+
+            # Identify the text if needed
+            if result is None:
+
+                # Identify the text
+                scoreList = None
+                if text:
+                    scoreList = languageIdentifier.identify(text, hint, hintMultiplier, topK, minimumShare)
+
+                # Fall back to the unknown language if nothing scored
+                if not scoreList:
+                    scoreList = [(LanguageIdentifier.UNKNOWN_LANGUAGE, 0, 0,)]
+
+                # Create the result, the language, score and share of each language
+                result = '\t'.join('{}\t{:.10f}\t{:.4f}'.format(language, score, share) for language, score, share in scoreList)
+
+                # Put the result in the identification cache
+                if identificationCache:
+                    identificationCache.put(textHash, fingerprint, modelFingerprint, result)
+
+            # Write the result line, the text file path followed by the result
+            resultFile.write(textFilePath + '\t' + result + '\n')
+            textFileCount += 1
+
+
+    # Write the last batch to the identification cache
+    if identificationCache:
+        identificationCache.flush()
+        logger.info('Identification cache hits: %d, misses: %d.', identificationCache.hitCount, identificationCache.missCount)
+
+    # Log
+    logger.info('Files identified: %d, in: %.3f seconds.', textFileCount, time.perf_counter() - startTime)
+
+
+    # Return the number of text files identified
+    return textFileCount
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   identifyTextFromCsvFile()
+#
+#   Purpose:    Identify the text in a column of a CSV/TSV file, writing the 
+#               rows back with the language and the score of the top language 
+#               appended, the first row is the header. The rows are read and 
+#               identified a chunk at a time, optionally across worker processes, 
+#               and written in the order they were read, so only a few chunks 
+#               are held at any one time
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier  the language identifier
+#               csvFilePath         the CSV file path
+#               columnName          the name of the column holding the text
+#               hint                the language hint (optional)
+#               hintMultiplier      the hint multiplier (optional)
+#               minimumShare        the minimum share of the top language, rows below it get the unknown language (optional)
+#               delimiter           the delimiter, defaults to a tab for '.tsv' files and a comma otherwise (optional)
+#               processCount        the number of worker processes, the rows are identified 
+#                                   in this process if not set (optional)
+#               textPrefixLength    the number of characters to identify from each text (optional)
+#               resultFile          the file the rows are written to (optional)
+#               shard               the shard, tuple of shard index and shard count, only the 
+#                                   rows in the shard are identified, keyed by row number, see parseShard() (optional)
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the CSV file path is invalid
+#               ValueError          if the column name is invalid
+#
+#   Returns:    the number of rows identified
+#
+def identifyTextFromCsvFile(languageIdentifier, csvFilePath, columnName, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, minimumShare=None, delimiter=None, processCount=None, 
+        textPrefixLength=None, resultFile=None, shard=None):
+
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+   
+    if not csvFilePath:
+        raise ValueError('Invalid CSV file path')
+
+    if not columnName:
+        raise ValueError('Invalid column name')
+
+
+    # Imported here, only needed when identifying a CSV file
+    import csv
+    import itertools
+
+    # Raise the CSV field size limit, text cells in large exports can be longer than the default
+    setCsvFieldSizeLimit()
+
+    # Write the rows to stdout by default
+    if not resultFile:
+        resultFile = sys.stdout
+
+    # Guess the delimiter from the CSV file path if needed
+    if not delimiter:
+        delimiter = '\t' if csvFilePath.lower().endswith('.tsv') else ','
+
+    # Start time and the number of rows identified
+    startTime = time.perf_counter()
+    rowCount = 0
+
+
+    # Open the CSV file, and create the reader and the writer
+    csvFile = open(csvFilePath, newline='', encoding='utf-8')
+    csvReader = csv.reader(csvFile, delimiter=delimiter)
+    csvWriter = csv.writer(resultFile, delimiter=delimiter, lineterminator='\n')
+
+    # Read the header, and find the column
+    headerRow = next(csvReader, None)
+    if not headerRow or columnName not in headerRow:
+        csvFile.close()
+        raise ValueError('Invalid column name: \'{}\', not in the header of CSV file: \'{}\''.format(columnName, csvFilePath))
+    columnIndex = headerRow.index(columnName)
+
+    # Write the header, with the language and score columns
+    csvWriter.writerow(headerRow + ['language', 'score'])
+
+    # Row iterator, skipping over the rows in other shards, keyed by row number after the header
+    rowIterator = csvReader
+    if shard:
+        rowIterator = (row for rowNumber, row in enumerate(csvReader) if getShardIndex(str(rowNumber), shard[1]) == shard[0])
+
+    # Chunk iterator, the rows a chunk at a time, and the texts in each chunk, rows without the column have no text
+    chunkIterator = iter(lambda: list(itertools.islice(rowIterator, CSV_CHUNK_ROW_COUNT)), [])
+    def getTexts(rowList):
+        return [row[columnIndex][:textPrefixLength] if columnIndex < len(row) else '' for row in rowList]
+
+
+    # Write the rows of a chunk, with the language and score of the top language, 
+    # short rows are padded so the language and score line up with the header
+    def writeChunk(rowList, scoreListList):
+        for row, scoreList in zip(rowList, scoreListList):
+            language, score, share = scoreList[0] if scoreList else (LanguageIdentifier.UNKNOWN_LANGUAGE, 0, 0,)
+            csvWriter.writerow(row + [''] * (len(headerRow) - len(row)) + [language, '{:.10f}'.format(score)])
+        return len(rowList)
+
+
+    # Identify the chunks in this process
+    if not processCount or processCount <= 1:
+        for rowList in chunkIterator:
+            rowCount += writeChunk(rowList, languageIdentifier.identifyBatch(getTexts(rowList), hint, hintMultiplier, 1, minimumShare, threadCount=1))
+
+    # Identify the chunks across worker processes
+    else:
+
+        # Imported here, only needed when identifying with worker processes
+        import concurrent.futures
+
+        # Identify queue, tuple of rows and future score lists, bounded to keep 
+        # every worker process busy without reading too far ahead
+        identifyQueue = collections.deque()
+        identifyQueueLength = processCount * 2
+
+        # Identify the chunks in a pool of worker processes, each with its own copy of the language identifier
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processCount, 
+                initializer=initializeWorker, initargs=(languageIdentifier,)) as executor:
+
+            # Loop until all the chunks have been identified
+            while True:
+
+                # Queue up chunks to identify
+                while len(identifyQueue) < identifyQueueLength:
+                    rowList = next(chunkIterator, None)
+                    if rowList is None:
+                        break
+                    identifyQueue.append((rowList, executor.submit(identifyWorkerBatch, getTexts(rowList), hint, hintMultiplier, minimumShare),))
+
+                # Done if there is nothing left to identify
+                if not identifyQueue:
+                    break
+
+                # Write the next chunk, waiting for it to be identified
+                rowList, scoreListListFuture = identifyQueue.popleft()
+                rowCount += writeChunk(rowList, scoreListListFuture.result())
+
+
+    # Close the CSV file
+    csvFile.close()
+
+    # Log
+    logger.info('Rows identified: %d, in: %.3f seconds.', rowCount, time.perf_counter() - startTime)
+
+
+    # Return the number of rows identified
+    return rowCount
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   setCsvFieldSizeLimit()
+#
+#   Purpose:    Raise the CSV field size limit as high as the platform allows, 
+#               the default limit of 131072 characters fails on longer text cells
+#
+#   Called by:  identifyTextFromCsvFile(), initializeWorker(), mergeShardFiles()
+#
+#   Parameters: 
+#
+#   Exceptions: 
+#
+#   Returns:    void
+#
+def setCsvFieldSizeLimit():
+
+    # Imported here, only needed when reading CSV files
+    import csv
+
+    # Set the field size limit, halving it until it fits in a C long on this platform
+    fieldSizeLimit = sys.maxsize
+    while True:
+        try:
+            csv.field_size_limit(fieldSizeLimit)
+            break
+        except OverflowError:
+            fieldSizeLimit //= 2
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   initializeWorker()
+#
+#   Purpose:    Initialize a worker process, setting the language identifier
+#               the worker process identifies with
+#
+#   Called by:  identifyTextFromCsvFile()
+#
+#   Parameters: languageIdentifier  the language identifier
+#
+#   Exceptions: 
+#
+#   Returns:    void
+#
+def initializeWorker(languageIdentifier):
+
+    # Set the worker language identifier
+    global workerLanguageIdentifier
+    workerLanguageIdentifier = languageIdentifier
+
+    # Raise the CSV field size limit in the worker process too
+    setCsvFieldSizeLimit()
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   identifyWorkerBatch()
+#
+#   Purpose:    Identify a batch of texts in a worker process, see initializeWorker()
+#
+#   Called by:  identifyTextFromCsvFile()
+#
+#   Parameters: texts           the texts
+#               hint            the language hint
+#               hintMultiplier  the hint multiplier
+#               minimumShare    the minimum share of the top language
+#
+#   Exceptions: 
+#
+#   Returns:    the score list for each text, see LanguageIdentifier.identifyBatch()
+#
+def identifyWorkerBatch(texts, hint, hintMultiplier, minimumShare):
+
+    # Identify the texts with the worker language identifier
+    return workerLanguageIdentifier.identifyBatch(texts, hint, hintMultiplier, 1, minimumShare, threadCount=1)
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   benchmarkTextFromFiles()
+#
+#   Purpose:    Benchmark identifying the text from multiple files with a pool 
+#               of threads sharing the language identifier, doubling the number 
+#               of threads up to the thread count, and listing the throughput 
+#               and the speedup over one thread, the text files are read first 
+#               so only identifying is timed
+#
+#               Throughput only scales with the number of threads on free 
+#               threaded Python, which is listed along with the results
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier  the language identifier
+#               textFilePaths       the text file paths, any iterable
+#               hint                the language hint (optional)
+#               hintMultiplier      the hint multiplier (optional)
+#               topK                the number of top scores (optional)
+#               threadCount         the maximum number of threads (optional)
+#               textPrefixLength    the number of characters to read from each text file (optional)
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the text file paths are invalid
+#
+#   Returns:    the throughput list, tuple of thread count and texts per second
+#
+def benchmarkTextFromFiles(languageIdentifier, textFilePaths, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, topK=1, threadCount=THREAD_COUNT, textPrefixLength=None):
+
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+   
+    if textFilePaths is None:
+        raise ValueError('Invalid text file paths')
+
+
+    # Read the text files
+    textList = [readTextFile(textFilePath, textPrefixLength) for textFilePath in textFilePaths]
+
+    # Log, the GIL is always enabled before Python 3.13
+    gilEnabled = sys._is_gil_enabled() if hasattr(sys, '_is_gil_enabled') else True
+    logger.info('Benchmarking files: %d, python: %s, GIL: %s', len(textList), sys.version.split()[0], 'enabled' if gilEnabled else 'disabled')
+
+
+    # Throughput list, tuple of thread count and texts per second
+    throughputList = list()
+
+    # Loop over the thread counts, doubling them up to the thread count
+    benchmarkThreadCount = 1
+    while True:
+
+        # Identify the texts, timing it
+        startTime = time.perf_counter()
+        languageIdentifier.identifyBatch(textList, hint, hintMultiplier, topK, threadCount=benchmarkThreadCount)
+        throughput = len(textList) / (time.perf_counter() - startTime)
+        throughputList.append((benchmarkThreadCount, throughput,))
+
+        # Log
+        logger.info('Threads: %d, texts per second: %.1f, speedup: %.2f', benchmarkThreadCount, throughput, throughput / throughputList[0][1])
+
+        # Next thread count
+        if benchmarkThreadCount >= max(1, threadCount):
+            break
+        benchmarkThreadCount = min(benchmarkThreadCount * 2, threadCount)
+
+
+    # Return the throughput list
+    return throughputList
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   benchmarkPruningFromFiles()
+#
+#   Purpose:    Benchmark getting the top scores for the text from multiple 
+#               files with and without pruning the languages that can't reach 
+#               the top scores, listing the time taken by each and the speedup, 
+#               the text files are read and their ngram dicts extracted first 
+#               so only scoring is timed, the pruned top languages are checked 
+#               against the full ones
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier  the language identifier
+#               textFilePaths       the text file paths, any iterable
+#               hint                the language hint (optional)
+#               hintMultiplier      the hint multiplier (optional)
+#               topK                the number of top scores (optional)
+#               textPrefixLength    the number of characters to read from each text file (optional)
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the text file paths are invalid
+#               ValueError          if the top k is invalid
+#
+#   Returns:    tuple of the seconds taken without and with pruning
+#
+def benchmarkPruningFromFiles(languageIdentifier, textFilePaths, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, topK=1, textPrefixLength=None):
 
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+   
+    if textFilePaths is None:
+        raise ValueError('Invalid text file paths')
 
-        # Set the instance variables
-        self.ngramDirectoryPath = ngramDirectoryPath
-        self.ngramFileNameExtension = ngramFileNameExtension
-        self.ngramMaximumLength = 0
-        self.languageNgramList = list()
-        self.hintMultiplier = hintMultiplier
+    if not topK or topK < 1:
+        raise ValueError('Invalid top k')
 
-        
-        # Ngram file path list, tuple of language and file path
-        ngramFilePathList = list()
 
-        # Create the match regex for filtering file names,
-        # matching the following formats:
-        #
-        #	en.txt
-        #	en_US.txt
-        #	zh-hans.txt
-        #	zh-hans_CN.txt
-        #   
-        ngramFileNameMatchRegex = re.compile(r'^(\w{{2}}|\w{{2}}_\w{{2}}|\w{{2}}-\w{{4}}|\w{{2}}-\w{{4}}_\w{{2}})\{}$'.format(self.ngramFileNameExtension))
+    # Read the text files, and extract the ngram dicts, skipping over text files without any terms
+    textNgramDictList = list()
+    for textFilePath in textFilePaths:
+        text = readTextFile(textFilePath, textPrefixLength)
+        textNgramDict = Ngram.extractNgramDict(text, ngramMaximumLength=languageIdentifier.ngramMaximumLength) if text else None
+        if textNgramDict:
+            textNgramDictList.append(textNgramDict)
 
-        # Walk over the the text directory
-        for dirname, dirnames, filenames in os.walk(self.ngramDirectoryPath):
-    
-            # Walk over the files names
-            for filename in filenames:
+    # Log
+    logger.info('Benchmarking pruning, files: %d, top k: %d, quantized: %s', len(textNgramDictList), topK, languageIdentifier.quantized)
 
-                # Match on the file name
-                matcher = ngramFileNameMatchRegex.match(filename)
-                    
-                # Skip over file names that don't match the regex
-                if not matcher:
-                    continue
-                
-                # Set the language from the ngram file name
-                language = matcher.group(1)
-                        
-                # Create the text file path
-                ngramFilePath = os.path.join(dirname, filename)
-        
-                # Add the language and ngram file path to the ngram file path list
-                ngramFilePathList.append((language, ngramFilePath,))
 
+    # Get the top scores without pruning, timing it
+    startTime = time.perf_counter()
+    scoreListList = [languageIdentifier.score(None, hint, hintMultiplier, topK, textNgramDict=textNgramDict) 
+            for textNgramDict in textNgramDictList]
+    seconds = time.perf_counter() - startTime
 
-        # Check that we got ngram files
-        if len(ngramFilePathList) == 0:
-            raise ValueError('Failed to find any ngram files in the ngram directory: \'{}\''.format(self.ngramDirectoryPath))
+    # Get the top scores with pruning, timing it
+    startTime = time.perf_counter()
+    prunedScoreListList = [languageIdentifier.score(None, hint, hintMultiplier, topK, textNgramDict=textNgramDict, pruned=True) 
+            for textNgramDict in textNgramDictList]
+    prunedSeconds = time.perf_counter() - startTime
 
-    
-        # Loop over the ngram file path list
-        for language, ngramFilePath in ngramFilePathList:
-        
-            # Create a new language ngram object for this ngram file path/language combination
-            languageNgram = Ngram(language, ngramFilePath)
-            
-            # Update the ngram maximum length
-            self.ngramMaximumLength = max(self.ngramMaximumLength, languageNgram.ngramMaximumLength)
-            
-            # And append the language ngram to the language ngram list
-            self.languageNgramList.append(languageNgram)
+    # Count the text files where pruning changed the top languages, which it never should
+    mismatchCount = sum(1 for scoreList, prunedScoreList in zip(scoreListList, prunedScoreListList) 
+            if [language for language, score in scoreList] != [language for language, score in prunedScoreList])
 
+    # Log
+    logger.info('Seconds without pruning: %.3f, with pruning: %.3f, speedup: %.2f, ranked differently: %d', 
+            seconds, prunedSeconds, seconds / prunedSeconds if prunedSeconds else 0, mismatchCount)
 
 
-    #--------------------------------------------------------------------------
-    #
-    #   Method:     score
-    #   
-    #   Purpose:    Get the scores for a piece of text
-    #
-    #   Parameters: text            text
-    #               hint            language hint
-    #               hintMultiplier  hint multiplier
-    #
-    #   Exceptions: ValueError      if the text is invalid
-    #
-    #   Returns:   
-    #
-    def score(self, text, hint=None, hintMultiplier=HINT_MULTIPLIER):
+    # Return the seconds taken without and with pruning
+    return seconds, prunedSeconds
 
-        # Check parameters
-        if not text:
-            raise ValueError('Invalid text')
 
-        
-        # Extract the ngram dict from the text
-        textNgramDict = Ngram.extractNgramDict(text, ngramMaximumLength=self.ngramMaximumLength)
-        
-        
-        # The score list, tuple of language and score
-        scoreList = list()
 
-        # Loop over the language ngram list, setting the language 
-        # and score in the score dict
-        for languageNgram in self.languageNgramList:
-            
-            # Get the score
-            score = languageNgram.score(textNgramDict=textNgramDict)
-        
-            # Set the score dict if the score is meaningful
-            if score:
+#--------------------------------------------------------------------------
+#
+#   Function:   readTextFile()
+#
+#   Purpose:    Read a text file, or the start of a text file
+#
+#   Called by:  identifyTextFromFiles(), evaluateQuantizedFromFiles(), benchmarkTextFromFiles(), benchmarkPruningFromFiles()
+#
+#   Parameters: textFilePath        the text file path
+#               textPrefixLength    the number of characters to read (optional)
+#
+#   Exceptions: 
+#
+#   Returns:    the text
+#
+def readTextFile(textFilePath, textPrefixLength=None):
 
-                # Multiply the score if a hint was provided and the language scored
-                if hint == languageNgram.language:
-                    if not hintMultiplier:
-                        hintMultiplier = self.hintMultiplier
-                    if hintMultiplier:
-                        score *= (1 + hintMultiplier)
-        
-                # Set the score dict if the score is meaningful
-                scoreList.append((languageNgram.language, score,))
-        
-        
-        # Sort the score list
-        scoreList = sorted(scoreList, key=lambda tuple: tuple[1], reverse=True)
+    # Open, read and close the text file
+    textFile = open(textFilePath, encoding='utf-8')
+    text = textFile.read(textPrefixLength if textPrefixLength else -1)
+    textFile.close()
 
+    # Return the text
+    return text
 
-        # And return the score list
-        return scoreList
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   listTextFilePaths()
+#
+#   Purpose:    List the text file paths in a text directory and/or matching a glob
+#
+#   Called by:   
+#
+#   Parameters: textDirectoryPath       the text directory path (optional)
+#               textGlob                the text glob, '**' matches any directory depth (optional)
+#               textFileNameExtension   the text file name extension, filtering the 
+#                                       text directory, not the text glob (optional)
+#               shard                   the shard, tuple of shard index and shard count, 
+#                                       only the text file paths in the shard are listed, 
+#                                       keyed by the text file path relative to the text 
+#                                       directory/glob root, see parseShard() (optional)
+#
+#   Exceptions: ValueError      if the text directory path/text glob is invalid
+#               ValueError      if both the text directory path and the text glob are sharded
+#
+#   Returns:    a generator over the text file paths
+#
+def listTextFilePaths(textDirectoryPath=None, textGlob=None, textFileNameExtension=TEXT_FILE_NAME_EXTENSION, shard=None):
+
+    # Check parameters
+    if not textDirectoryPath and not textGlob:
+        raise ValueError('Invalid text directory path/text glob')
+
+    if shard and textDirectoryPath and textGlob:
+        raise ValueError('Invalid text directory path/text glob, only one of them can be sharded')
+
+
+    # Walk over the the text directory
+    if textDirectoryPath:
+        for dirname, dirnames, filenames in os.walk(textDirectoryPath):
+
+            # Walk the directories in order so the text file paths are listed in a stable order
+            dirnames.sort()
+
+            # Walk over the files names, skipping over file names with a different extension, and text files in other shards
+            for filename in sorted(filenames):
+                if not textFileNameExtension or filename.endswith(textFileNameExtension):
+                    textFilePath = os.path.join(dirname, filename)
+                    if not shard or getShardIndex(getShardKey(textFilePath, textDirectoryPath), shard[1]) == shard[0]:
+                        yield textFilePath
+
+    # Expand the text glob, skipping over directories, and list the text file paths in 
+    # directory walk order so they are listed in a stable order
+    if textGlob:
+        import glob
+        globRootPath = getGlobRootPath(textGlob)
+        for textFilePath in sorted(glob.iglob(textGlob, recursive=True), key=getWalkOrderKey):
+            if os.path.isfile(textFilePath) and (not shard or getShardIndex(getShardKey(textFilePath, globRootPath), shard[1]) == shard[0]):
+                yield textFilePath
 
 
 
 #--------------------------------------------------------------------------
+#
+#   Function:   getWalkOrderKey()
+#
+#   Purpose:    Get the sort key for a text file path which puts text file 
+#               paths in directory walk order, the files in a directory in 
+#               name order, followed by its subdirectories in name order
+#
+#   Called by:  listTextFilePaths(), mergeShardFiles()
+#
+#   Parameters: textFilePath    the text file path
+#
+#   Exceptions: 
+#
+#   Returns:    the sort key
+#
+def getWalkOrderKey(textFilePath):
+
+    # Split the text file path into its directory names and its file name
+    dirname, filename = os.path.split(textFilePath)
+    return (dirname.split(os.sep), filename,)
+
+
+
 #--------------------------------------------------------------------------
 #
-#   Function:   createFromFile()
+#   Function:   getGlobRootPath()
 #
-#   Purpose:    Create from file
+#   Purpose:    Get the root path of a text glob, the directory before its 
+#               first wildcard, which the text files it matches are sharded 
+#               relative to
+#
+#   Called by:  listTextFilePaths()
+#
+#   Parameters: textGlob        the text glob
+#
+#   Exceptions: 
+#
+#   Returns:    the root path
+#
+def getGlobRootPath(textGlob):
+
+    # Find the first wildcard, the root path is the directory before it
+    matcher = re.search(r'[*?[]', textGlob)
+    return os.path.dirname(textGlob[:matcher.start()] if matcher else textGlob) or os.curdir
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   getShardKey()
+#
+#   Purpose:    Get the shard key for a text file path, the text file path 
+#               relative to the text directory/glob root path it was listed 
+#               from, with '/' separators, so the text file gets the same 
+#               shard however the root path was spelled on each node
+#
+#   Called by:  listTextFilePaths(), createFromDirectory(), mergeShardFiles()
+#
+#   Parameters: textFilePath    the text file path
+#               rootPath        the text directory/glob root path
+#
+#   Exceptions: 
+#
+#   Returns:    the shard key
+#
+def getShardKey(textFilePath, rootPath):
+
+    # Get the text file path relative to the root path
+    return os.path.relpath(textFilePath, rootPath).replace(os.sep, '/')
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   parseShard()
+#
+#   Purpose:    Parse a shard, 'i/n' where i is the shard index, counting 
+#               from 1, and n is the shard count
 #
 #   Called by:   
 #
-#   Parameters: textFilePath        the text file path (optional)
-#               textFile            the text file (optional)
-#               ngramFilePath       the ngram file path (optional)
-#               ngramFile           the ngram file (optional)
-#               ngramMaximumLength  the ngram maximum length (optional)
+#   Parameters: shard           the shard, 'i/n'
 #
-#   Exceptions: ValueError      if the text file path/text file is invalid
-#               ValueError      if the ngram file path/ngram file is invalid
+#   Exceptions: ValueError      if the shard is invalid
 #
-#   Returns:   
+#   Returns:    the shard, tuple of shard index and shard count
 #
-def createFromFile(textFilePath=None, textFile=None, ngramFilePath=None, ngramFile=None,
-        ngramMaximumLength=Ngram.NGRAM_MAXIMUM_LENGTH):
+def parseShard(shard):
+
+    # Split the shard into the shard index and the shard count
+    try:
+        shardIndex, shardCount = (int(value) for value in shard.split('/'))
+    except (AttributeError, ValueError):
+        raise ValueError('Invalid shard: \'{}\', expected: \'i/n\''.format(shard))
+
+    # Check the shard index against the shard count
+    if shardCount < 1 or not 1 <= shardIndex <= shardCount:
+        raise ValueError('Invalid shard: \'{}\', expected: \'i/n\', with i from 1 to n'.format(shard))
+
+    # Return the shard
+    return (shardIndex, shardCount,)
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   getShardIndex()
+#
+#   Purpose:    Get the shard index for a key, from a stable hash of the key, 
+#               so every node puts the key in the same shard without talking 
+#               to the others, the key is a text file path relative to the 
+#               text directory/glob root, see getShardKey(), or a row number
+#
+#   Called by:  listTextFilePaths(), createFromDirectory(), identifyTextFromCsvFile(), mergeShardFiles()
+#
+#   Parameters: key             the key
+#               shardCount      the shard count
+#
+#   Exceptions: 
+#
+#   Returns:    the shard index, counting from 1
+#
+def getShardIndex(key, shardCount):
+
+    # Imported here, only needed when sharding
+    import hashlib
+
+    # Hash the key, the built in hash is salted per process so it can't be used here
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8', 'surrogateescape'), digest_size=8).digest(), 'big') % shardCount + 1
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   writeShardSummaryFile()
+#
+#   Purpose:    Write the shard summary file next to the result file of a shard, 
+#               one tab separated name and value per line, read back when 
+#               merging the shards, see mergeShardFiles()
+#
+#   Called by:   
+#
+#   Parameters: resultFilePath  the result file path of the shard
+#               shard           the shard, tuple of shard index and shard count
+#               resultFormat    the result format, 'files' for result lines, 'csv' for CSV rows
+#               resultCount     the number of results written
+#               seconds         the number of seconds the shard took
+#               delimiter       the CSV delimiter (optional)
+#               rootPath        the text directory/glob root path the shard keys 
+#                               are relative to, for result lines (optional)
+#
+#   Exceptions: ValueError      if the result file path is invalid
+#
+#   Returns:    void
+#
+def writeShardSummaryFile(resultFilePath, shard, resultFormat, resultCount, seconds, delimiter=None, rootPath=None):
+
+    # Check parameters
+    if not resultFilePath:
+        raise ValueError('Invalid result file path')
+
+
+    # Open, write and close the shard summary file
+    summaryFile = open(resultFilePath + SHARD_SUMMARY_FILE_NAME_EXTENSION, 'w', encoding='utf-8')
+    summaryFile.write('shard\t{}/{}\n'.format(*shard))
+    summaryFile.write('format\t{}\n'.format(resultFormat))
+    if delimiter:
+        summaryFile.write('delimiter\t{}\n'.format('\\t' if delimiter == '\t' else delimiter))
+    if rootPath:
+        summaryFile.write('root\t{}\n'.format(rootPath))
+    summaryFile.write('count\t{}\n'.format(resultCount))
+    summaryFile.write('seconds\t{:.3f}\n'.format(seconds))
+    summaryFile.close()
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   mergeShardFiles()
+#
+#   Purpose:    Merge the result files of the shards into one result file, 
+#               verifying them against their shard summary files first: all 
+#               the shards need to be there exactly once, with the number of 
+#               results their summary lists, and every result needs to be in 
+#               the shard its key hashes to
+#
+#               Result lines are keyed by their text file path relative to the 
+#               root path in their shard summary file, so shards run with the 
+#               text directory/glob at different paths merge, and are merged in 
+#               directory walk order, CSV rows are merged in row order, which is 
+#               rebuilt by taking each row from the shard its row number hashes to
+#
+#   Called by:   
+#
+#   Parameters: resultFilePaths the result file paths of the shards
+#               resultFile      the file the merged results are written to (optional)
+#
+#   Exceptions: ValueError      if the result file paths are invalid
+#               ValueError      if the shards don't verify
+#
+#   Returns:    the number of results merged
+#
+def mergeShardFiles(resultFilePaths, resultFile=None):
+
+    # Check parameters
+    if not resultFilePaths:
+        raise ValueError('Invalid result file paths')
+
+
+    # Write the merged results to stdout by default
+    if not resultFile:
+        resultFile = sys.stdout
+
+    # Summary dict, shard summary keyed by shard index
+    summaryDict = dict()
+
+    # Read the shard summary files
+    for resultFilePath in resultFilePaths:
+        summaryFile = open(resultFilePath + SHARD_SUMMARY_FILE_NAME_EXTENSION, encoding='utf-8')
+        summary = dict(line.rstrip('\n').split('\t', 1) for line in summaryFile if line.strip())
+        summaryFile.close()
+        shardIndex, shardCount = parseShard(summary.get('shard'))
+        if shardIndex in summaryDict:
+            raise ValueError('Invalid shard: \'{}\', in result files: \'{}\' and \'{}\''.format(summary['shard'], summaryDict[shardIndex]['resultFilePath'], resultFilePath))
+        summaryDict[shardIndex] = dict(summary, resultFilePath=resultFilePath, shardCount=shardCount, count=int(summary['count']), seconds=float(summary['seconds']))
+
+    # Check that all the shards are there, with the same shard count and result format
+    summaryList = [summaryDict[shardIndex] for shardIndex in sorted(summaryDict)]
+    shardCount = summaryList[0]['shardCount']
+    resultFormat = summaryList[0]['format']
+    if any(summary['shardCount'] != shardCount or summary['format'] != resultFormat for summary in summaryList):
+        raise ValueError('Invalid shards, the shard counts and/or result formats differ')
+    if sorted(summaryDict) != list(range(1, shardCount + 1)):
+        raise ValueError('Invalid shards, missing shards: {}'.format(', '.join(str(shardIndex) for shardIndex in range(1, shardCount + 1) if shardIndex not in summaryDict)))
+
+
+    # Merge result lines
+    if resultFormat == 'files':
+
+        # Result line list, tuple of sort key and result line, and shard key set
+        resultLineList = list()
+        shardKeySet = set()
+
+        # Read the result files, checking the number of result lines, and that each text file path is in its shard, once
+        for shardIndex, summary in summaryDict.items():
+            resultFilePath = summary['resultFilePath']
+            if not summary.get('root'):
+                raise ValueError('Invalid shard summary file: \'{}\', no root path'.format(resultFilePath + SHARD_SUMMARY_FILE_NAME_EXTENSION))
+            shardResultFile = open(resultFilePath, encoding='utf-8')
+            resultFileLineList = shardResultFile.read().splitlines()
+            shardResultFile.close()
+            if len(resultFileLineList) != summary['count']:
+                raise ValueError('Invalid result file: \'{}\', result lines: {}, expected: {}'.format(resultFilePath, len(resultFileLineList), summary['count']))
+            for resultLine in resultFileLineList:
+                shardKey = getShardKey(resultLine.split('\t', 1)[0], summary['root'])
+                if getShardIndex(shardKey, shardCount) != shardIndex:
+                    raise ValueError('Invalid result line: \'{}\', in result file: \'{}\', text file path not in shard: {}'.format(resultLine, resultFilePath, shardIndex))
+                if shardKey in shardKeySet:
+                    raise ValueError('Invalid result line: \'{}\', in result file: \'{}\', text file path listed more than once'.format(resultLine, resultFilePath))
+                shardKeySet.add(shardKey)
+                resultLineList.append((getWalkOrderKey(shardKey.replace('/', os.sep)), resultLine,))
+
+        # Write the result lines in directory walk order, the order they were listed in, see listTextFilePaths()
+        resultLineList.sort(key=operator.itemgetter(0))
+        for sortKey, resultLine in resultLineList:
+            resultFile.write(resultLine + '\n')
+        resultCount = len(resultLineList)
+
+    # Merge CSV rows
+    elif resultFormat == 'csv':
+
+        # Imported here, only needed when merging CSV rows
+        import csv
+
+        # Raise the CSV field size limit, text cells in large exports can be longer than the default
+        setCsvFieldSizeLimit()
+
+        # Open the result files, and create the readers and the writer
+        delimiter = summaryList[0].get('delimiter', ',').replace('\\t', '\t')
+        csvFileDict = {shardIndex: open(summary['resultFilePath'], newline='', encoding='utf-8') for shardIndex, summary in summaryDict.items()}
+        csvReaderDict = {shardIndex: csv.reader(csvFile, delimiter=delimiter) for shardIndex, csvFile in csvFileDict.items()}
+        csvWriter = csv.writer(resultFile, delimiter=delimiter, lineterminator='\n')
+
+        # Check that the headers are the same, and write the header
+        headerRowList = [next(csvReader, None) for csvReader in csvReaderDict.values()]
+        if any(headerRow != headerRowList[0] for headerRow in headerRowList):
+            raise ValueError('Invalid result files, the CSV headers differ')
+        csvWriter.writerow(headerRowList[0])
+
+        # Write the rows in row order, taking each row from the shard its row number hashes to, 
+        # until the shard to take from has no rows left, the other shards should be out of rows too
+        rowCountDict = dict.fromkeys(summaryDict, 0)
+        rowNumber = 0
+        while True:
+            shardIndex = getShardIndex(str(rowNumber), shardCount)
+            row = next(csvReaderDict[shardIndex], None)
+            if row is None:
+                break
+            csvWriter.writerow(row)
+            rowCountDict[shardIndex] += 1
+            rowNumber += 1
+
+        # Check that all the rows were merged, and that the number of rows match
+        for shardIndex, csvReader in csvReaderDict.items():
+            if next(csvReader, None) is not None or rowCountDict[shardIndex] != summaryDict[shardIndex]['count']:
+                raise ValueError('Invalid result file: \'{}\', rows merged: {}, expected: {}'.format(summaryDict[shardIndex]['resultFilePath'], 
+                        rowCountDict[shardIndex], summaryDict[shardIndex]['count']))
+        resultCount = rowNumber
+
+        # Close the result files
+        for csvFile in csvFileDict.values():
+            csvFile.close()
+
+    # Fail
+    else:
+        raise ValueError('Invalid result format: \'{}\''.format(resultFormat))
+
+
+    # Log the timing of each shard, and how far the slowest shard is from the average
+    for shardIndex, summary in summaryDict.items():
+        logger.info('Shard: %d/%d, results: %d, in: %.3f seconds.', shardIndex, shardCount, summary['count'], summary['seconds'])
+    averageSeconds = sum(summary['seconds'] for summary in summaryList) / shardCount
+    logger.info('Results merged: %d, slowest shard: %.3f seconds, average: %.3f seconds, imbalance: %.2f', resultCount, 
+            max(summary['seconds'] for summary in summaryList), averageSeconds, 
+            max(summary['seconds'] for summary in summaryList) / averageSeconds if averageSeconds else 1)
+
+
+    # Return the number of results merged
+    return resultCount
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   evaluateQuantizedFromFiles()
+#
+#   Purpose:    Evaluate the quantized ngrams against the ngrams on held out 
+#               text files, checking that the top languages are ranked the 
+#               same for each text file, and listing the largest relative score 
+#               error, the text files should not be the ones the ngrams were 
+#               created from
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier          the language identifier, the reference, not quantized
+#               quantizedLanguageIdentifier the quantized language identifier
+#               textFilePaths               the text file paths, any iterable
+#               topK                        the number of top languages to compare (optional)
+#               textPrefixLength            the number of characters to read from each text file (optional)
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the language identifier is quantized
+#               ValueError          if the quantized language identifier is invalid
+#               ValueError          if the text file paths are invalid
+#
+#   Returns:    the number of text files where the top languages were ranked differently
+#
+def evaluateQuantizedFromFiles(languageIdentifier, quantizedLanguageIdentifier, textFilePaths, topK=None, textPrefixLength=None):
+
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+   
+    if not quantizedLanguageIdentifier:
+        raise ValueError('Invalid quantized language identifier')
+
+    if languageIdentifier.quantized:
+        raise ValueError('Invalid language identifier, the reference language identifier is quantized')
+
+    if textFilePaths is None:
+        raise ValueError('Invalid text file paths')
+
+
+    # Number of text files evaluated, number of text files ranked differently, and largest relative score error
+    textFileCount = 0
+    mismatchCount = 0
+    maximumScoreError = 0
+
+    # Loop over the text file paths
+    for textFilePath in textFilePaths:
+
+        # Read the text file, and extract the ngram dict, skipping over text files without any terms
+        text = readTextFile(textFilePath, textPrefixLength)
+        textNgramDict = Ngram.extractNgramDict(text, ngramMaximumLength=languageIdentifier.ngramMaximumLength) if text else None
+        if not textNgramDict:
+            continue
 
-    # Check parameters
-    if not textFilePath and not textFile:
-        raise ValueError('Invalid text file path/text file')
-    elif textFilePath and textFile:
-        raise ValueError('Invalid text file path/text file')
-   
-    if not ngramFilePath and not ngramFile:
-        raise ValueError('Invalid ngram file path/ngram file')
-    elif ngramFilePath and ngramFile:
-        raise ValueError('Invalid ngram file path/ngram file')
+        # Get the scores from both, scoring all the languages so pruning does not come into it
+        scoreList = languageIdentifier.score(None, textNgramDict=textNgramDict)[:topK]
+        quantizedScoreList = quantizedLanguageIdentifier.score(None, textNgramDict=textNgramDict)[:topK]
+        textFileCount += 1
 
-    
-    # Log 
-    if textFilePath and ngramFilePath:
-        logger.info('Processing from: \'%s\', to: \'%s\'.', textFilePath, ngramFilePath)
-    elif textFilePath and not ngramFilePath:
-        logger.info('Processing from: \'%s\', to: \'stdout\'.', textFilePath)
-    elif not textFilePath and ngramFilePath:
-        logger.info('Processing from: \'stdin\', to: \'%s\'.', ngramFilePath)
-    elif not textFilePath and not ngramFilePath:
-        logger.info('Processing from: \'stdin\', to: \'stdout\'.')
+        # Check that the top languages are ranked the same
+        languageList = [language for language, score in scoreList]
+        quantizedLanguageList = [language for language, score in quantizedScoreList]
+        if languageList != quantizedLanguageList:
+            logger.warning('Ranking changed for file: \'%s\', from: %s, to: %s', textFilePath, 
+                    ', '.join(languageList), ', '.join(quantizedLanguageList))
+            mismatchCount += 1
 
+        # Update the largest relative score error
+        quantizedScoreDict = dict(quantizedScoreList)
+        for language, score in scoreList:
+            if language in quantizedScoreDict:
+                maximumScoreError = max(maximumScoreError, abs(quantizedScoreDict[language] - score) / score)
 
-    # Create the ngram file
-    Ngram.createNgramFile(textFilePath=textFilePath, textFile=textFile, ngramFilePath=ngramFilePath, ngramFile=ngramFile, ngramMaximumLength=ngramMaximumLength)
+
+    # Log
+    logger.info('Files evaluated: %d, ranked differently: %d, largest relative score error: %.2e', 
+            textFileCount, mismatchCount, maximumScoreError)
+
+
+    # Return the number of text files ranked differently
+    return mismatchCount
 
 
 
 #--------------------------------------------------------------------------
 #
-#   Function:   createFromDirectory()
+#   Function:   createFamilyFile()
 #
-#   Purpose:    Create from directory
+#   Purpose:    Cluster the languages into families of similar languages and 
+#               write the family file, one family per line with its languages 
+#               separated by a space, see LanguageIdentifier.clusterFamilies()
 #
 #   Called by:   
 #
-#   Parameters: textDirectoryPath       the text directory path
-#               ngramDirectoryPath      the ngram directory path
-#               textFileNameExtension   the text file name extension (optional)
-#               ngramFileNameExtension  the ngram file name extension (optional)
-#               ngramMaximumLength      the ngram maximum length (optional)
+#   Parameters: languageIdentifier  the language identifier
+#               familyFilePath      the family file path
+#               familyCount         the family count (optional)
 #
-#   Exceptions: ValueError      if the text directory path is invalid
-#               ValueError      if the ngram directory path is invalid
+#   Exceptions: ValueError          if the language identifier is invalid
+#               ValueError          if the family file path is invalid
 #
-#   Returns:   
+#   Returns:    void
 #
-def createFromDirectory(textDirectoryPath, ngramDirectoryPath, 
-        textFileNameExtension=TEXT_FILE_NAME_EXTENSION, 
-        ngramFileNameExtension=LanguageIdentifier.NGRAM_FILE_NAME_EXTENSION, 
-        ngramMaximumLength=Ngram.NGRAM_MAXIMUM_LENGTH):
+def createFamilyFile(languageIdentifier, familyFilePath, familyCount=LanguageIdentifier.FAMILY_COUNT):
 
     # Check parameters
-    if not textDirectoryPath:
-        raise ValueError('Invalid text directory path')
-   
-    if not ngramDirectoryPath:
-        raise ValueError('Invalid ngram directory path')
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
    
-  
-    # Create the match regex for filtering text file names,
-    # matching the following formats:
-    #
-    #	en.txt
-    #	en_US.txt
-    #	zh-hans.txt
-    #	zh-hans_CN.txt
-    #	
-    textFileNameMatchRegex = re.compile(r'^(\w{{2}}|\w{{2}}_\w{{2}}|\w{{2}}-\w{{4}}|\w{{2}}-\w{{4}}_\w{{2}})\{}$'.format(textFileNameExtension))
+    if not familyFilePath:
+        raise ValueError('Invalid family file path')
 
 
-    # Walk over the the text directory
-    for dirname, dirnames, filenames in os.walk(textDirectoryPath):
-    
-        # Walk over the files names
-        for filename in filenames:
-        
-            # Skip over file names that don't match the regex
-            if not textFileNameMatchRegex.match(filename):
-                continue
+    # Cluster the languages into families
+    familyList = languageIdentifier.clusterFamilies(familyCount)
 
-            # Create the text file path
-            textFilePath = os.path.join(dirname, filename)
-        
-            # Create the ngram file name
-            ngramFileName = filename[:-(len(textFileNameExtension))] + ngramFileNameExtension
+    # Open, write and close the family file
+    familyFile = open(familyFilePath, 'w', encoding='utf-8')
+    for family in familyList:
+        familyFile.write('{}\n'.format(' '.join(family)))
+    familyFile.close()
 
-            # Create the ngram file path
-            ngramFilePath = os.path.join(ngramDirectoryPath, ngramFileName)
-            
-            # Create with the file path
-            createFromFile(textFilePath=textFilePath, ngramFilePath=ngramFilePath, ngramMaximumLength=ngramMaximumLength)
+    # Log
+    for family in familyList:
+        logger.info('Family: %s', ', '.join(family))
 
 
 
 #--------------------------------------------------------------------------
 #
-#   Function:   identifyText()
+#   Function:   segmentText()
 #
-#   Purpose:    Identify the text
+#   Purpose:    Segment the text into language spans
 #
 #   Called by:   
 #
@@ -826,14 +4749,15 @@ def createFromDirectory(textDirectoryPath, ngramDirectoryPath,
 #               text                the text
 #               hint                the language hint (optional)
 #               hintMultiplier      the hint multiplier (optional)
+#               windowLength        the window length in terms (optional)
 #
 #   Exceptions: ValueError          if the language identifier is invalid
 #               ValueError          if the text is invalid
 #
 #   Returns:   
 #
-def identifyText(languageIdentifier, text, hint=None, 
-        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER):
+def segmentText(languageIdentifier, text, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, windowLength=LanguageIdentifier.SEGMENT_WINDOW_LENGTH):
 
     # Check parameters
     if not languageIdentifier:
@@ -843,34 +4767,25 @@ def identifyText(languageIdentifier, text, hint=None,
         raise ValueError('Invalid text')
 
 
-    # Get the scores for the text
-    scoreList = languageIdentifier.score(text, hint, hintMultiplier)
-    
-    # List the scores
-    if scoreList:
-        
-        # Total score
-        totalScore = 0
+    # Get the spans for the text
+    spanList = languageIdentifier.segment(text, hint, hintMultiplier, windowLength)
+
+    # List the spans
+    if spanList:
+        for language, start, end in spanList:
+            logger.info('{:<10}    {:>10}    {:>10}'.format(language, start, end))
 
-        # Get the total score
-        for language, score in scoreList:
-            totalScore += score
-        
-        # List the scores
-        for language, score in scoreList:
-            logger.info('{:<10}    {:.10f}    {:.0%}'.format(language, score, (score / totalScore)))
-    
     # Fail
     else:
-        logger.warn('Could not identify the passed text')
+        logger.warn('Could not segment the passed text')
 
 
 
 #--------------------------------------------------------------------------
 #
-#   Function:   identifyTextFromFile()
+#   Function:   segmentTextFromFile()
 #
-#   Purpose:    Identify the text from a file
+#   Purpose:    Segment the text from a file into language spans
 #
 #   Called by:   
 #
@@ -878,14 +4793,15 @@ def identifyText(languageIdentifier, text, hint=None,
 #               textFilePath        the text file path
 #               hint                the language hint (optional)
 #               hintMultiplier      the hint multiplier (optional)
+#               windowLength        the window length in terms (optional)
 #
 #   Exceptions: ValueError          if the language identifier is invalid
 #               ValueError          if the text file path is invalid
 #
 #   Returns:   
 #
-def identifyTextFromFile(languageIdentifier, textFilePath, hint=None, 
-        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER):
+def segmentTextFromFile(languageIdentifier, textFilePath, hint=None, 
+        hintMultiplier=LanguageIdentifier.HINT_MULTIPLIER, windowLength=LanguageIdentifier.SEGMENT_WINDOW_LENGTH):
 
     # Check parameters
     if not languageIdentifier:
@@ -903,8 +4819,70 @@ def identifyTextFromFile(languageIdentifier, textFilePath, hint=None,
     text = textFile.read()
     textFile.close()
 
-    # Identify the text
-    identifyText(languageIdentifier, text, hint, hintMultiplier)
+    # Segment the text
+    segmentText(languageIdentifier, text, hint, hintMultiplier, windowLength)
+
+
+
+#--------------------------------------------------------------------------
+#
+#   Function:   listStatistics()
+#
+#   Purpose:    List the statistics for the language identifier, one line 
+#               per language followed by a line with the totals
+#
+#   Called by:   
+#
+#   Parameters: languageIdentifier  the language identifier
+#
+#   Exceptions: ValueError          if the language identifier is invalid
+#
+#   Returns:   
+#
+def listStatistics(languageIdentifier):
+
+    # Check parameters
+    if not languageIdentifier:
+        raise ValueError('Invalid language identifier')
+
+
+    # Get the statistics
+    statistics = languageIdentifier.getStatistics()
+
+    # Representation list, in the order they were counted
+    representationList = list(statistics['representationDict'].keys())
+
+    # Ngram length list
+    ngramLengthList = sorted(statistics['ngramLengthCountDict'].keys())
+
+
+    # Representation width list, wide enough for the representation names
+    representationWidthList = [max(14, len(representation)) for representation in representationList]
+
+    # List the header
+    logger.info('{:<10}    {:>8}    {}    {:>8}    {}'.format('language', 'ngrams', 
+            '    '.join('{:>8}'.format('len {}'.format(ngramLength)) for ngramLength in ngramLengthList), 'load ms', 
+            '    '.join('{:>{}}'.format(representation, width) for representation, width in zip(representationList, representationWidthList))))
+
+    # List the statistics for each language, and the totals
+    for languageStatistics in statistics['languageStatisticsList'] + [dict(statistics, language='total')]:
+        logger.info('{:<10}    {:>8}    {}    {:>8.1f}    {}'.format(languageStatistics['language'], languageStatistics['ngramCount'], 
+                '    '.join('{:>8}'.format(languageStatistics['ngramLengthCountDict'].get(ngramLength, 0)) for ngramLength in ngramLengthList),
+                languageStatistics['loadTime'] * 1000, 
+                '    '.join('{:>{},}'.format(languageStatistics['representationDict'].get(representation, {}).get('totalBytes', 0), width) 
+                        for representation, width in zip(representationList, representationWidthList))))
+
+    # The load times of the languages overlap when they are loaded by several threads
+    logger.info('load ms for each language is measured in the thread loading it, so the load times overlap when loaded by several threads, '
+            'the total load ms is the wall clock load time')
+
+
+    # List the bytes breakdown for each representation
+    for representation, bytesDict in statistics['representationDict'].items():
+        logger.info('{:<14}    {}'.format(representation, ', '.join('{}: {:,}'.format(name, byteCount) for name, byteCount in bytesDict.items())))
+
+    # List the weights
+    logger.info('{:<14}    {}'.format('weights', 'uint16, scaled per ngram length' if statistics['quantized'] else 'float'))
 
 
 
@@ -927,18 +4905,57 @@ def usage():
     print('')
     print('Processing options:')
     print('\t[--create] create ngrams, default is to identify text language')
+    print('\t[--statistics] list the number of ngrams, load time and bytes used for each language')
+    print('\t[--update] update the count file with the text file and/or the merge count files, and regenerate the ngram file if passed')
+    print('\t[--segment] segment the text into language spans, listing the language, start offset and end offset of each span')
+    print('\t[--window-length=#] segment window length in terms, optional, defaults to: {}'.format(LanguageIdentifier.SEGMENT_WINDOW_LENGTH))
     print('\t[--hint=name] language hint, optional, no default')
     print('\t[--hint-multiplier=#] language hint multiplier, optional, defaults, defaults to: \'{}\''.format(LanguageIdentifier.HINT_MULTIPLIER))
+    print('\t[--top-k=#] number of top languages to list, optional, defaults to listing all the languages')
+    print('\t[--cascade] score the short words in the text first, and only score all the ngrams in the text if that is not decisive')
+    print('\t[--cascade-margin=#] cascade margin, the top two word scores need to be this far apart, relative to the top score, to be decisive, optional, defaults to: \'{}\''.format(LanguageIdentifier.CASCADE_MARGIN))
+    print('\t[--quantized] quantize the ngrams to uint16 weights scaled per ngram length, which uses less memory')
+    print('\t[--compiled] compile the ngrams of all the languages into one index so each text ngram is looked up once, which takes longer to load and uses more memory but scores a lot faster')
+    print('\t[--benchmark] benchmark identifying the text directory/glob with a pool of threads sharing the language identifier, doubling the threads up to the thread count')
+    print('\t[--benchmark-pruning] benchmark getting the top k scores for the text directory/glob with and without pruning the languages that can\'t reach them')
+    print('\t[--create-families] cluster the languages into families of similar languages and write the family file')
+    print('\t[--family-file=name] family file name, texts are scored against the family centroids first and then only against the languages in the top families, optional, no default')
+    print('\t[--family-count=#] number of families to cluster the languages into, optional, defaults to: {}'.format(LanguageIdentifier.FAMILY_COUNT))
+    print('\t[--family-top-k=#] number of top families whose languages are scored, optional, defaults to: {}'.format(LanguageIdentifier.FAMILY_TOP_K))
+    print('\t[--evaluate-quantized] check that the quantized ngrams rank the top languages the same as the ngrams on held out text files, failing if they do not')
+    print('\t[--minimum-share=#] minimum share the top language needs, the share being the margin of the top language over the runner up relative to the top score, (top score - runner up score) / top score, optional, \'{}\' is listed if the top language does not reach it'.format(LanguageIdentifier.UNKNOWN_LANGUAGE))
     print('')
     print('Text options:')
     print('\t[--text=name|--text-file=name|--text-directory=name] text, text file name or text directory name, optional, defaults to \'stdin\'.')
     print('\t[--text-file-extension=name] text file name extension, optional, defaults to: \'{}\''.format(TEXT_FILE_NAME_EXTENSION))
+    print('\t[--text-glob=pattern] text file glob when identifying text language, \'**\' matches any directory depth, optional, no default')
+    print('\t[--text-byte-budget=#] number of bytes to read from the text file when identifying a text file, optional, defaults to the whole file')
+    print('\t[--csv-file=name] CSV/TSV file name, the text in the CSV column is identified and the rows are written to stdout with the language and score appended, optional, no default')
+    print('\t[--csv-column=name] CSV column name, the name of the column holding the text in the header row of the CSV file, optional, no default')
+    print('\t[--csv-delimiter=char] CSV delimiter, optional, defaults to a tab for \'.tsv\' files and a comma otherwise')
+    print('\t[--process-count=#] number of worker processes identifying the CSV file, optional, defaults to identifying in this process')
+    print('\t[--text-prefix-length=#] number of characters to read from each text file when identifying a text directory/glob, optional, defaults to the whole file')
+    print('\t[--shard=i/n] identify/create with the text files, or CSV rows, in shard i of n only, from a stable hash of the text file path relative to the text directory/glob, or row number, so several nodes can share a run, optional, no default')
+    print('\t[--result-file=name] result file name when identifying a text directory/glob or CSV file, a shard summary file is written next to it when sharding, optional, defaults to \'stdout\', needed when sharding')
+    print('\t[--merge-shards] merge the shard result files into the result file, verifying them against their shard summary files')
+    print('\t[--merge-shard-file=name] shard result file name to merge, repeated for each shard, optional, no default')
+    print('\t[--thread-count=#] number of threads reading text files when identifying a text directory/glob, optional, defaults to: {}'.format(THREAD_COUNT))
+    print('\t[--load-thread-count=#] number of threads reading ngram files, optional, defaults to: {} on free threaded Python, and 1 otherwise'.format(LOAD_THREAD_COUNT))
+    print('')
+    print('Cache options:')
+    print('\t[--cache-file=name] identification cache file name, text files already identified with the same ngrams and settings are skipped when identifying a text directory/glob, optional, no default')
+    print('\t[--compact-cache] evict the results identified with other ngrams, and those older than the cache maximum age, and compact the cache file')
+    print('\t[--cache-maximum-age=#] number of days since a result was last used before it is evicted when compacting, optional, no default')
     print('')
     print('Ngram options:')
     print('\t[--ngram-file=name|--ngram-directory=name] ngram file name or ngram directory name, optional, defaults to \'stdout\'.')
     print('\t[--ngram-file-extension=name] ngram file name extension, optional, defaults to: \'{}\''.format(LanguageIdentifier.NGRAM_FILE_NAME_EXTENSION))
     print('\t[--ngram-maximum-length=#] ngram length, defaults to: {}'.format(Ngram.NGRAM_MAXIMUM_LENGTH))
     print('')
+    print('Count options:')
+    print('\t[--count-file=name|--count-directory=name] count file name or count directory name, keeps the raw ngram counts, optional, no default')
+    print('\t[--merge-count-file=name] count file name to merge into the count file, can be repeated, optional, no default')
+    print('')
 
 
 
@@ -959,6 +4976,25 @@ def usage():
 if __name__ == '__main__':
 
 
+    # Imported here, only needed by the command line
+    import getopt
+    import locale
+
+
+    # Logging basic config
+    logging.basicConfig(format=LOGGING_FORMAT, level=logging.INFO)
+
+    # Set the locale, falling back to the environment locale if it is not available, 
+    # and to the C locale if that is not available either
+    try:
+        locale.setlocale(locale.LC_ALL, LOCALE)
+    except locale.Error:
+        try:
+            locale.setlocale(locale.LC_ALL, '')
+        except locale.Error as exception:
+            logger.warning('Failed to set the locale: \'%s\', or the environment locale, %s, using the C locale', LOCALE, exception)
+
+
     # The options
     opts = None
 
@@ -966,9 +5002,14 @@ if __name__ == '__main__':
     # Get the command line parameters
     try:
         opts, args = getopt.getopt(sys.argv[1:], 'h', ['help',
-                'create', 'hint=', 'hint-multiplier=',
-                'text=', 'text-file=', 'text-directory=', 'text-file-extension=',
-                'ngram-file=', 'ngram-directory=', 'ngram-file-extension='])
+                'create', 'update', 'statistics', 'segment', 'window-length=', 'hint=', 'hint-multiplier=', 'top-k=', 'minimum-share=', 'cascade', 'cascade-margin=', 'quantized', 'evaluate-quantized', 'compiled', 'benchmark', 'benchmark-pruning',
+                'create-families', 'family-file=', 'family-count=', 'family-top-k=',
+                'text=', 'text-file=', 'text-directory=', 'text-file-extension=', 'text-glob=', 'text-prefix-length=', 'text-byte-budget=', 'thread-count=', 'load-thread-count=',
+                'csv-file=', 'csv-column=', 'csv-delimiter=', 'process-count=',
+                'shard=', 'result-file=', 'merge-shards', 'merge-shard-file=',
+                'cache-file=', 'compact-cache', 'cache-maximum-age=',
+                'ngram-file=', 'ngram-directory=', 'ngram-file-extension=',
+                'count-file=', 'count-directory=', 'merge-count-file='])
 
     # Handle exception, print error and usage
     except getopt.GetoptError as exception:
@@ -983,12 +5024,60 @@ if __name__ == '__main__':
     # Create flag
     create = False
 
+    # Update flag
+    update = False
+
+    # Statistics flag
+    statistics = False
+
+    # Segment flag
+    segment = False
+
+    # Window length
+    windowLength = LanguageIdentifier.SEGMENT_WINDOW_LENGTH
+
     # Hint
     hint = None
 
     # Hint multiplier
     hintMultiplier = LanguageIdentifier.HINT_MULTIPLIER
 
+    # Top k
+    topK = None
+
+    # Minimum share
+    minimumShare = None
+
+    # Cascade margin
+    cascadeMargin = None
+
+    # Quantized flag
+    quantized = False
+
+    # Evaluate quantized flag
+    evaluateQuantized = False
+
+    # Compiled flag
+    compiled = False
+
+    # Benchmark flag
+    benchmark = False
+
+    # Benchmark pruning flag
+    benchmarkPruning = False
+
+    # Create families flag
+    createFamilies = False
+
+    # Family file path
+    familyFilePath = None
+
+    # Family count
+    familyCount = LanguageIdentifier.FAMILY_COUNT
+
+    # Family top k
+    familyTopK = LanguageIdentifier.FAMILY_TOP_K
+
     # Text
     text = None
 
@@ -1001,6 +5090,54 @@ if __name__ == '__main__':
     # Text file name extension
     textFileNameExtension = TEXT_FILE_NAME_EXTENSION
 
+    # Text glob
+    textGlob = None
+
+    # Text prefix length
+    textPrefixLength = None
+
+    # Text byte budget
+    textByteBudget = None
+
+    # Thread count
+    threadCount = THREAD_COUNT
+
+    # Load thread count
+    loadThreadCount = None
+
+    # CSV file path
+    csvFilePath = None
+
+    # CSV column name
+    csvColumnName = None
+
+    # CSV delimiter
+    csvDelimiter = None
+
+    # Process count
+    processCount = None
+
+    # Shard
+    shard = None
+
+    # Result file path
+    resultFilePath = None
+
+    # Merge shards flag
+    mergeShards = False
+
+    # Merge shard file path list
+    mergeShardFilePathList = list()
+
+    # Cache file path
+    cacheFilePath = None
+
+    # Compact cache flag
+    compactCache = False
+
+    # Cache maximum age, in days
+    cacheMaximumAge = None
+
     # Ngram file path
     ngramFilePath = None
 
@@ -1013,6 +5150,15 @@ if __name__ == '__main__':
     # Ngram maximum length
     ngramMaximumLength = Ngram.NGRAM_MAXIMUM_LENGTH
 
+    # Count file path
+    countFilePath = None
+
+    # Count directory path
+    countDirectoryPath = None
+
+    # Merge count file path list
+    mergeCountFilePathList = list()
+
 
     # Process the options
     for opt, arg in opts:
@@ -1020,12 +5166,63 @@ if __name__ == '__main__':
         if opt == '--create':
             create = True
 
+        elif opt == '--update':
+            update = True
+
+        elif opt == '--statistics':
+            statistics = True
+
+        elif opt == '--segment':
+            segment = True
+
+        elif opt == '--window-length':
+            windowLength = int(arg)
+
         elif opt == '--hint':
             hint = arg
 
         elif opt == '--hint-multiplier':
             hintMultiplier = arg
 
+        elif opt == '--top-k':
+            topK = int(arg)
+
+        elif opt == '--minimum-share':
+            minimumShare = float(arg)
+
+        elif opt == '--cascade':
+            cascadeMargin = cascadeMargin or LanguageIdentifier.CASCADE_MARGIN
+
+        elif opt == '--cascade-margin':
+            cascadeMargin = float(arg)
+
+        elif opt == '--quantized':
+            quantized = True
+
+        elif opt == '--evaluate-quantized':
+            evaluateQuantized = True
+
+        elif opt == '--compiled':
+            compiled = True
+
+        elif opt == '--benchmark':
+            benchmark = True
+
+        elif opt == '--benchmark-pruning':
+            benchmarkPruning = True
+
+        elif opt == '--create-families':
+            createFamilies = True
+
+        elif opt == '--family-file':
+            familyFilePath = arg
+
+        elif opt == '--family-count':
+            familyCount = int(arg)
+
+        elif opt == '--family-top-k':
+            familyTopK = int(arg)
+
         elif opt == '--text':
             text = arg
 
@@ -1038,6 +5235,61 @@ if __name__ == '__main__':
         elif opt == '--text-file-extension':
             textFileNameExtension = arg
 
+        elif opt == '--text-glob':
+            textGlob = arg
+
+        elif opt == '--text-prefix-length':
+            textPrefixLength = int(arg)
+
+        elif opt == '--text-byte-budget':
+            textByteBudget = int(arg)
+
+        elif opt == '--thread-count':
+            threadCount = int(arg)
+
+        elif opt == '--load-thread-count':
+            loadThreadCount = int(arg)
+
+        elif opt == '--csv-file':
+            csvFilePath = arg
+
+        elif opt == '--csv-column':
+            csvColumnName = arg
+
+        elif opt == '--csv-delimiter':
+            csvDelimiter = '\t' if arg == '\\t' else arg
+
+        elif opt == '--process-count':
+            processCount = int(arg)
+
+        elif opt == '--shard':
+            try:
+                shard = parseShard(arg)
+            except ValueError as exception:
+                print(str(exception))
+                print('')
+
+                usage()
+                sys.exit(-1)
+
+        elif opt == '--result-file':
+            resultFilePath = arg
+
+        elif opt == '--merge-shards':
+            mergeShards = True
+
+        elif opt == '--merge-shard-file':
+            mergeShardFilePathList.append(arg)
+
+        elif opt == '--cache-file':
+            cacheFilePath = arg
+
+        elif opt == '--compact-cache':
+            compactCache = True
+
+        elif opt == '--cache-maximum-age':
+            cacheMaximumAge = float(arg)
+
         elif opt == '--ngram-file':
             ngramFilePath = arg
 
@@ -1050,6 +5302,15 @@ if __name__ == '__main__':
         elif opt == '--ngram-maximum-length':
             ngramMaximumLength = arg
 
+        elif opt == '--count-file':
+            countFilePath = arg
+
+        elif opt == '--count-directory':
+            countDirectoryPath = arg
+
+        elif opt == '--merge-count-file':
+            mergeCountFilePathList.append(arg)
+
         elif opt in ('-h', '--help'):
             usage()
             sys.exit(-1)
@@ -1059,6 +5320,13 @@ if __name__ == '__main__':
 
 
 
+    # Check the shard, the shard summary file of an identification is written next to its result file, 
+    # and the shard keys are relative to one text directory/glob
+    if shard and ((not create and not resultFilePath) or (textDirectoryPath and textGlob)):
+        logger.error('Invalid parameter combination, sharding needs a result file, unless creating, and either a text directory or a text glob')
+        sys.exit(-1)
+
+
     # Create ngram
     if create: 
 
@@ -1067,7 +5335,8 @@ if __name__ == '__main__':
 
             # Create with directory path
             createFromDirectory(textDirectoryPath, ngramDirectoryPath, textFileNameExtension=textFileNameExtension, 
-                    ngramFileNameExtension=ngramFileNameExtension, ngramMaximumLength=ngramMaximumLength)
+                    ngramFileNameExtension=ngramFileNameExtension, ngramMaximumLength=ngramMaximumLength, 
+                    countDirectoryPath=countDirectoryPath, shard=shard)
     
         # File/stdin to file/stdout
         elif not textDirectoryPath and not ngramDirectoryPath:
@@ -1086,7 +5355,43 @@ if __name__ == '__main__':
 
             # Create with file path
             createFromFile(textFilePath=textFilePath, textFile=textFile, ngramFilePath=ngramFilePath, 
-                    ngramFile=ngramFile, ngramMaximumLength=ngramMaximumLength)
+                    ngramFile=ngramFile, ngramMaximumLength=ngramMaximumLength, countFilePath=countFilePath)
+
+        # Fail
+        else:
+            logger.error('Invalid parameter combination')
+            sys.exit(-1)
+
+    # Update ngram
+    elif update:
+
+        # Count file with a text file and/or count files to merge in
+        if countFilePath and (textFilePath or mergeCountFilePathList):
+
+            # Update with file path
+            updateFromFile(countFilePath, textFilePath=textFilePath, mergeCountFilePathList=mergeCountFilePathList, 
+                    ngramFilePath=ngramFilePath, ngramMaximumLength=ngramMaximumLength)
+
+        # Fail
+        else:
+            logger.error('Invalid parameter combination')
+            sys.exit(-1)
+
+    # Merge shards
+    elif mergeShards:
+
+        # Shard result files
+        if mergeShardFilePathList:
+
+            # Open the result file if needed
+            resultFile = open(resultFilePath, 'w', newline='', encoding='utf-8') if resultFilePath else None
+
+            # Merge the shard result files
+            mergeShardFiles(mergeShardFilePathList, resultFile)
+
+            # Close the result file
+            if resultFile:
+                resultFile.close()
 
         # Fail
         else:
@@ -1096,21 +5401,135 @@ if __name__ == '__main__':
     # Identify text 
     else:
 
-        # Create the language identifier
-        languageIdentifier = LanguageIdentifier(ngramDirectoryPath, ngramFileNameExtension, hintMultiplier)
+        # Create the language identifier, the family file is read unless it is being created
+        languageIdentifier = LanguageIdentifier(ngramDirectoryPath, ngramFileNameExtension, hintMultiplier, cascadeMargin, loadThreadCount, quantized, compiled, 
+                None if createFamilies else familyFilePath, familyTopK)
+
+
+        # Statistics
+        if statistics:
+
+            # List the statistics
+            listStatistics(languageIdentifier)
+
+        # Create families with the family file path
+        elif createFamilies and familyFilePath:
+
+            # Create the family file
+            createFamilyFile(languageIdentifier, familyFilePath, familyCount)
+
+        # Benchmark with the text directory path/text glob
+        elif benchmark and (textDirectoryPath or textGlob):
+
+            # Freeze the language identifier since the threads share it, and benchmark with the text file paths
+            benchmarkTextFromFiles(languageIdentifier.freeze(), listTextFilePaths(textDirectoryPath, textGlob, textFileNameExtension), 
+                    hint, hintMultiplier, topK or 1, threadCount, textPrefixLength)
+
+        # Benchmark pruning with the text directory path/text glob
+        elif benchmarkPruning and (textDirectoryPath or textGlob):
+
+            # Benchmark pruning with the text file paths
+            benchmarkPruningFromFiles(languageIdentifier, listTextFilePaths(textDirectoryPath, textGlob, textFileNameExtension), 
+                    hint, hintMultiplier, topK or 1, textPrefixLength)
+
+        # Compact cache
+        elif compactCache and cacheFilePath:
+
+            # Compact the identification cache, evicting the results from other ngrams
+            identificationCache = IdentificationCache(cacheFilePath)
+            evictCount = identificationCache.compact(languageIdentifier.getFingerprint(), 
+                    cacheMaximumAge * 24 * 60 * 60 if cacheMaximumAge is not None else None)
+            identificationCache.close()
+
+            # Log
+            logger.info('Identification cache results evicted: %d', evictCount)
+
+        # Evaluate quantized with the text file path/text directory path/text glob
+        elif evaluateQuantized and (textFilePath or textDirectoryPath or textGlob):
 
+            # Create the quantized language identifier, and the reference language identifier, 
+            # which can't be quantized or it would be comparing the quantized ngrams with themselves
+            quantizedLanguageIdentifier = LanguageIdentifier(ngramDirectoryPath, ngramFileNameExtension, hintMultiplier, 
+                    cascadeMargin, loadThreadCount, quantized=True)
+            referenceLanguageIdentifier = languageIdentifier
+            if languageIdentifier.quantized:
+                referenceLanguageIdentifier = LanguageIdentifier(ngramDirectoryPath, ngramFileNameExtension, hintMultiplier, 
+                        cascadeMargin, loadThreadCount, quantized=False, compiled=compiled)
+
+            # Evaluate with the text file paths, failing if any ranking changed
+            if evaluateQuantizedFromFiles(referenceLanguageIdentifier, quantizedLanguageIdentifier, 
+                    [textFilePath] if textFilePath else listTextFilePaths(textDirectoryPath, textGlob, textFileNameExtension), 
+                    topK, textPrefixLength):
+                logger.error('Quantized ngrams ranked the top languages differently')
+                sys.exit(-1)
+
+        # CSV file path with the CSV column name
+        elif csvFilePath and csvColumnName:
+
+            # Open the result file if needed
+            resultFile = open(resultFilePath, 'w', newline='', encoding='utf-8') if resultFilePath else None
+
+            # Identify with CSV file path
+            startTime = time.perf_counter()
+            rowCount = identifyTextFromCsvFile(languageIdentifier, csvFilePath, csvColumnName, hint, hintMultiplier, 
+                    minimumShare, csvDelimiter, processCount, textPrefixLength, resultFile, shard)
+
+            # Close the result file, and write the shard summary file if needed
+            if resultFile:
+                resultFile.close()
+                if shard:
+                    writeShardSummaryFile(resultFilePath, shard, 'csv', rowCount, time.perf_counter() - startTime, 
+                            csvDelimiter or ('\t' if csvFilePath.lower().endswith('.tsv') else ','))
+
+        # Segment text file path
+        elif segment and textFilePath:
+
+            # Segment with file path
+            segmentTextFromFile(languageIdentifier, textFilePath, hint, hintMultiplier, windowLength)
+
+        # Segment text
+        elif segment and text:
+
+            # Segment text
+            segmentText(languageIdentifier, text, hint, hintMultiplier, windowLength)
 
         # Text file path
-        if textFilePath:
+        elif textFilePath:
 
             # Identify with file path
-            identifyTextFromFile(languageIdentifier, textFilePath, hint, hintMultiplier)
+            identifyTextFromFile(languageIdentifier, textFilePath, hint, hintMultiplier, topK, minimumShare, textByteBudget)
     
         # Text
         elif text:
 
             # Identify text
-            identifyText(languageIdentifier, text, hint, hintMultiplier)
+            identifyText(languageIdentifier, text, hint, hintMultiplier, topK, minimumShare)
+
+        # Text directory path/text glob
+        elif textDirectoryPath or textGlob:
+
+            # Open the identification cache if needed
+            identificationCache = IdentificationCache(cacheFilePath) if cacheFilePath else None
+
+            # Open the result file if needed
+            resultFile = open(resultFilePath, 'w', encoding='utf-8') if resultFilePath else None
+
+            # Identify with the text file paths, listing the top language only by default
+            startTime = time.perf_counter()
+            textFileCount = identifyTextFromFiles(languageIdentifier, listTextFilePaths(textDirectoryPath, textGlob, textFileNameExtension, shard), 
+                    hint, hintMultiplier, topK or 1, minimumShare, threadCount, textPrefixLength, 
+                    resultFile, identificationCache)
+
+            # Close the identification cache
+            if identificationCache:
+                identificationCache.close()
+
+            # Close the result file, and write the shard summary file if needed
+            if resultFile:
+                resultFile.close()
+                if shard:
+                    writeShardSummaryFile(resultFilePath, shard, 'files', textFileCount, time.perf_counter() - startTime, 
+                            rootPath=textDirectoryPath or getGlobRootPath(textGlob))
 
         # Fail
         else: